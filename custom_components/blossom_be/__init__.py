@@ -1,47 +1,202 @@
 # __init__.py
 import logging
 import asyncio
-from .const import DOMAIN, CONF_REFRESH_TOKEN
+import random
+from functools import partial
+import voluptuous as vol
+from .const import (
+    DOMAIN,
+    CONF_ACCESS_TOKEN,
+    CONF_REFRESH_TOKEN,
+    CONF_TOKEN_EXPIRY,
+    CONF_RECORD_CASSETTE,
+    CONF_TARGET_KWH,
+    DEFAULT_TARGET_KWH,
+    STARTUP_JITTER,
+    STARTUP_STAGGER,
+)
+from .api import RATE_LIMITS, BlossomApiClient, account_unique_id
+from .auth import BlossomTokenManager, token_store
 from .coordinator import BlossomDataUpdateCoordinator
-from homeassistant.core import HomeAssistant
+from .history import BlossomSessionHistory
+from .rates import BlossomChargingRates
+from .ratelimit import async_get_rate_limiters
+from .statistics_import import BlossomStatisticsImporter
+from .transport import CASSETTE_VERSION, BlossomRecordingClient
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.storage import Store
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS = ["sensor", "select"]
 
+# Token store shared by every entry before the tokens were stored per entry
+LEGACY_STORAGE_KEY = f"{DOMAIN}_storage"
+# Stores kept per config entry, their keys end with the entry id: the tokens,
+# the warm start snapshot, the session history, the statistics watermarks and
+# the recorded cassette
+ENTRY_STORES = ("storage", "snapshot", "sessions", "statistics", "cassette")
+
+SERVICE_GET_METRICS = "get_metrics"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+GET_METRICS_SCHEMA = vol.Schema({vol.Optional(ATTR_CONFIG_ENTRY_ID): str})
+
+async def async_get_metrics(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the request metrics of one or every config entry."""
+    coordinators = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    return {
+        key: coordinator.metrics_snapshot()
+        for key, coordinator in coordinators.items()
+        if entry_id in (None, key)
+    }
+
+async def _async_initial_tokens(hass: HomeAssistant, config_entry: ConfigEntry, store: Store) -> dict:
+    """Return the tokens of an entry without a token store of its own, and store them.
+
+    The config flow hands the first tokens over in the entry data. Entries
+    created before the tokens were stored per entry have only a refresh token
+    there, which may have rotated since: the first of them takes over the
+    store all entries used to share.
+    """
+    data = {key: config_entry.data.get(key) for key in (CONF_REFRESH_TOKEN, CONF_ACCESS_TOKEN, CONF_TOKEN_EXPIRY)}
+    if CONF_ACCESS_TOKEN not in config_entry.data and LEGACY_STORAGE_KEY not in hass.data:
+        # Claimed before the first await, so a single entry migrates
+        hass.data[LEGACY_STORAGE_KEY] = config_entry.entry_id
+        legacy = Store(hass, version=1, key=LEGACY_STORAGE_KEY)
+        legacy_data = await legacy.async_load()
+        if legacy_data:
+            _LOGGER.info("Moving the stored tokens to the token store of entry %s.", config_entry.title)
+            data = legacy_data
+            await legacy.async_remove()
+    await store.async_save(data)
+    return data
+
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     _LOGGER.debug("Setup entry component.")
     """Set up the integration from a config entry."""
     if DOMAIN in hass.data and config_entry.entry_id in hass.data[DOMAIN]:
         return True
 
-    # Load stored data
-    store = Store(hass, version=1, key=f"{DOMAIN}_storage")
+    # Load the tokens of this entry, every account rotates its own refresh token
+    store = token_store(hass, config_entry.entry_id)
     stored_data = await store.async_load()
+    if stored_data is None:
+        stored_data = await _async_initial_tokens(hass, config_entry, store)
+
+    # One pooled API client per config entry, reused by every poll and command
+    # The rate limits are shared with the other config entries
+    session = async_get_clientsession(hass)
+    rate_limits = async_get_rate_limiters(hass, RATE_LIMITS)
+    if config_entry.options.get(CONF_RECORD_CASSETTE):
+        cassette = Store(hass, CASSETTE_VERSION, f"{DOMAIN}_cassette_{config_entry.entry_id}")
+        client = BlossomRecordingClient(session, cassette, rate_limits, config_entry.entry_id)
+    else:
+        client = BlossomApiClient(session, rate_limits, config_entry.entry_id)
+
+    # The stored tokens (refresh token, and the access token while it is valid)
+    # are shared by the polls and the mode changes
+    tokens = BlossomTokenManager(hass, client, store, stored_data)
+
+    coordinator = BlossomDataUpdateCoordinator(hass, config_entry, client, tokens)
+    entries = hass.data.setdefault(DOMAIN, {})
+    entries[config_entry.entry_id] = coordinator
+    # All entries start together after a restart, spread their first polls
+    stagger = 0 if hass.is_running else (len(entries) - 1) * STARTUP_STAGGER + random.uniform(0, STARTUP_JITTER)
+
+    if await coordinator.async_restore_snapshot():
+        # Entities show the data persisted at shutdown right away, the first
+        # live refresh runs in the background
+        async def _async_first_refresh():
+            await asyncio.sleep(stagger)
+            await coordinator.async_refresh()
 
-    # Check if the refresh token is available in storage
-    refresh_token = stored_data.get(CONF_REFRESH_TOKEN) if stored_data else None
+        config_entry.async_create_background_task(hass, _async_first_refresh(), f"{DOMAIN} first refresh")
+    else:
+        # Nothing persisted yet, perform the first data fetch
+        try:
+            await asyncio.sleep(stagger)
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            # Don't leave a background token refresh behind for a failed setup
+            hass.data[DOMAIN].pop(config_entry.entry_id, None)
+            await tokens.async_shutdown()
+            raise
 
-    # Perform the first data fetch
-    coordinator = BlossomDataUpdateCoordinator(hass, refresh_token)
-    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = coordinator    
-    await coordinator.async_config_entry_first_refresh()
+    # Entries created before the unique id was set get it once their installations are known
+    unique_id = account_unique_id(coordinator.installations)
+    if config_entry.unique_id is None and unique_id and not any(
+        entry.unique_id == unique_id for entry in hass.config_entries.async_entries(DOMAIN)
+    ):
+        hass.config_entries.async_update_entry(config_entry, unique_id=unique_id)
+
+    # Local history of completed charging sessions
+    history = coordinator.session_history = BlossomSessionHistory(hass, config_entry.entry_id)
+    await history.async_load()
+    history.async_update(coordinator.installations, coordinator.data)
+    config_entry.async_on_unload(coordinator.async_add_listener(
+        lambda: history.async_update(coordinator.installations, coordinator.data)
+    ))
+
+    # Charging power and rates derived from the kWh counters
+    rates = coordinator.charging_rates = BlossomChargingRates(
+        config_entry.options.get(CONF_TARGET_KWH, DEFAULT_TARGET_KWH)
+    )
+    rates.async_update(coordinator.installations, coordinator.data, coordinator.endpoint_updated)
+    config_entry.async_on_unload(coordinator.async_add_listener(
+        lambda: rates.async_update(coordinator.installations, coordinator.data, coordinator.endpoint_updated)
+    ))
+
+    # Hourly long-term statistics of the charged energy
+    await BlossomStatisticsImporter(hass, coordinator).async_setup()
 
     # Forward setup to platforms
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+
+    if not hass.services.has_service(DOMAIN, SERVICE_GET_METRICS):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_GET_METRICS,
+            partial(async_get_metrics, hass),
+            schema=GET_METRICS_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+
+    # Reload when the refresh intervals are changed in the options flow
+    config_entry.async_on_unload(config_entry.add_update_listener(async_reload_entry))
     return True
 
+async def async_reload_entry(hass: HomeAssistant, config_entry: ConfigEntry):
+    """Reload the config entry after its options changed."""
+    coordinator = hass.data.get(DOMAIN, {}).get(config_entry.entry_id)
+    if coordinator is not None and coordinator.options == config_entry.options:
+        # Only the stored member/installation ids changed, nothing to reload
+        return
+    await hass.config_entries.async_reload(config_entry.entry_id)
+
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry):
+    """Remove the stores of a deleted config entry."""
+    for name in ENTRY_STORES:
+        await Store(hass, version=1, key=f"{DOMAIN}_{name}_{config_entry.entry_id}").async_remove()
+
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     """Unload a config entry."""
     _LOGGER.debug("Unload entry component.")
-    if DOMAIN in hass.data:
-        hass.data[DOMAIN].pop(config_entry.entry_id, None)
-
     unload_ok = True
     for platform in PLATFORMS:
         if not await hass.config_entries.async_forward_entry_unload(config_entry, platform):
             unload_ok = False
             break
 
+    if unload_ok and DOMAIN in hass.data:
+        coordinator = hass.data[DOMAIN].pop(config_entry.entry_id, None)
+        if coordinator is not None:
+            await coordinator.tokens.async_shutdown()
+            await coordinator.session_history.async_flush()
+            await coordinator.async_flush_snapshot()
+            await coordinator.client.async_close()
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_GET_METRICS)
+
     return unload_ok
@@ -0,0 +1,241 @@
+"""HTTP client for the Blossom API and its Auth0 tenant."""
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import aiohttp
+from homeassistant.util.json import json_loads
+
+from .const import CONF_INSTALLATION_ID, CONF_MEMBER_ID
+from .ratelimit import TokenBucket, parse_retry_after
+
+_LOGGER = logging.getLogger(__name__)
+
+# API endpoints
+CURRENT_URL = "https://api.blossom.be/api/users/current"
+SET_POINTS_URL = "https://api.blossom.be/api/hems/set-points"
+HEMS_URL = "https://api.blossom.be/api/hems"
+CONSUMPTION_URL = "https://api.blossom.be/api/hems/energy-consumption"
+UPDATE_MODE_URL = "https://api.blossom.be/api/hems/set-points"
+SESSION_URL = "https://api.blossom.be/api/charging-session/employee/active"
+DEVICES_URL = "https://api.blossom.be/api/optimile/devices"
+AUTH_URL = "https://blossom-production.eu.auth0.com/oauth/token"
+CLIENT_ID = "RTofmsbiLPSlisRHtIFohGRPBcGgrIrs"
+
+# Maximum number of concurrent connections opened towards a single host.
+MAX_CONNECTIONS_PER_HOST = 4
+
+# Requests per second and burst size per host, shared by every config entry
+RATE_LIMITS = {
+    urlsplit(CURRENT_URL).netloc: (1, 10),
+    urlsplit(AUTH_URL).netloc: (0.1, 3),
+}
+# Seconds to hold back requests after a 429 without a usable Retry-After
+DEFAULT_RETRY_AFTER = 60
+
+# Statuses of an installation scoped endpoint meaning our member/installation ids are outdated
+IDENTITY_ERRORS = (401, 403, 404)
+
+
+class BlossomApiError(Exception):
+    """Raised when the Blossom API cannot be reached."""
+
+
+class BlossomAuthError(BlossomApiError):
+    """Raised when Auth0 rejects a refresh token."""
+
+    def __init__(self, status: int, data: dict | None = None):
+        super().__init__(f"Authentication error: {status}")
+        self.status = status
+        self.data = data or {}
+
+
+def parse_installations(current_data: dict) -> list[dict]:
+    """Return every installation of a /users/current response with its member id.
+
+    Each item is a dict with the installation id, the id of the member to
+    use for it and the installation name (when the API provides one).
+    """
+    members = [member for member in current_data.get("members") or [] if member.get("id")]
+    installations = []
+    for index, installation in enumerate(current_data.get("installations") or []):
+        installation_id = installation.get("id")
+        if not installation_id or not members:
+            continue
+        # Prefer the member linked to this installation, else pair them by position
+        member = next(
+            (
+                member for member in members
+                if installation_id in (member.get("installationId"), (member.get("installation") or {}).get("id"))
+            ),
+            members[min(index, len(members) - 1)],
+        )
+        installations.append({
+            CONF_INSTALLATION_ID: installation_id,
+            CONF_MEMBER_ID: member["id"],
+            "name": installation.get("name"),
+        })
+    return installations
+
+
+def account_unique_id(installations: list[dict]) -> str | None:
+    """Return the unique id of the account of installations, the lowest of its member ids."""
+    return min((item[CONF_MEMBER_ID] for item in installations), default=None)
+
+
+class BlossomApiClient:
+    """Long-lived client shared by everything belonging to one config entry.
+
+    All requests go through a single pooled aiohttp session, so connections
+    to api.blossom.be and Auth0 are kept alive between polls instead of
+    paying a DNS lookup and TLS handshake on every call.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, rate_limits: dict[str, TokenBucket] | None = None, owner: str = ""):
+        """Initialize the client on top of an existing (shared) session.
+
+        rate_limits holds the token bucket per host, shared with the clients
+        of the other config entries. owner identifies this client in their
+        queues, so they take turns fairly.
+        """
+        self._session = session
+        self._rate_limits = rate_limits or {}
+        self._owner = owner
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._closed = False
+        self.bytes_received = Counter()  # Response body bytes per url
+
+    @asynccontextmanager
+    async def _limit(self, url: str, timeout: float | None = None):
+        """Wait for the rate limit and a free connection slot of the host of url.
+
+        timeout only starts once the request may go out: the time spent
+        queued behind the other requests is not held against it.
+        """
+        host = urlsplit(url).netloc
+        bucket = self._rate_limits.get(host)
+        if bucket is not None:
+            await bucket.acquire(self._owner)
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+        async with limit, asyncio.timeout(timeout):
+            yield
+
+    def _throttled(self, url: str, response: aiohttp.ClientResponse):
+        """Hold back every request to the host of url after a 429 answer."""
+        host = urlsplit(url).netloc
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = DEFAULT_RETRY_AFTER
+        _LOGGER.warning("Rate limited by %s, pausing requests for %.0f seconds.", host, delay)
+        bucket = self._rate_limits.get(host)
+        if bucket is not None:
+            bucket.pause(delay)
+
+    def retry_after(self, url: str) -> float:
+        """Return the seconds requests to the host of url are still held back."""
+        bucket = self._rate_limits.get(urlsplit(url).netloc)
+        return bucket.retry_after if bucket is not None else 0
+
+    async def async_request_token(self, refresh_token: str) -> dict:
+        """Exchange a refresh token for a new access token.
+
+        Blossom uses refresh token rotation, so the returned payload also
+        holds the refresh token to use next time.
+        """
+        payload = {
+            "grant_type": "refresh_token",
+            "client_id": CLIENT_ID,
+            "refresh_token": refresh_token,
+        }
+        if self._closed:
+            raise BlossomApiError("Client is closed")
+        try:
+            async with self._limit(AUTH_URL):
+                async with self._session.post(AUTH_URL, json=payload) as response:
+                    if response.status == 429:
+                        self._throttled(AUTH_URL, response)
+                        raise BlossomApiError("Rate limited by Auth0")
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError as err:
+                        # E.g. the html error page of a proxy, only a 4xx rejects the token
+                        if 400 <= response.status < 500:
+                            raise BlossomAuthError(response.status) from err
+                        raise BlossomApiError(f"Invalid answer from Auth0: HTTP {response.status}") from err
+                    if response.status != 200:
+                        raise BlossomAuthError(response.status, data)
+                    return data
+        except aiohttp.ClientError as err:
+            raise BlossomApiError(f"Error talking to Auth0: {err}") from err
+
+    async def async_get(self, url: str, access_token: str, params: dict | None = None, validators: tuple | None = None,
+                        timeout: float | None = None):
+        """GET a Blossom endpoint, return a (status, json, validators) tuple.
+
+        validators is the (etag, last modified, digest) triple of a previous
+        response of the same endpoint. The ETag and Last-Modified values are
+        sent as conditional headers, so an unchanged resource answers 304
+        without a body. When the server sends neither header, the digest of
+        the body is compared instead: an identical body is not decoded and is
+        returned like a 304.
+
+        The json part is None when the response status is not 200. timeout
+        bounds the request in seconds, not the wait for the rate limit, and
+        raises TimeoutError.
+        """
+        if self._closed:
+            raise BlossomApiError("Client is closed")
+        headers = {"Authorization": f"Bearer {access_token}"}
+        if validators:
+            etag, last_modified, _ = validators
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        async with self._limit(url, timeout):
+            async with self._session.get(url, headers=headers, params=params) as response:
+                if response.status == 304:
+                    return response.status, None, validators
+                if response.status == 429:
+                    self._throttled(url, response)
+                if response.status != 200:
+                    return response.status, None, None
+                body = await response.read()
+
+        self.bytes_received[url] += len(body)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        digest = None if etag or last_modified else hashlib.blake2b(body, digest_size=16).digest()
+        if digest is not None and validators and validators[2] == digest:
+            # Same body as last time, skip decoding and parsing it
+            return 304, None, validators
+        return response.status, json_loads(body), (etag, last_modified, digest)
+
+    async def async_post(self, url: str, access_token: str, json_data: dict, params: dict | None = None,
+                         timeout: float | None = None) -> int:
+        """POST json_data to a Blossom endpoint, return the response status, timeout as for async_get."""
+        if self._closed:
+            raise BlossomApiError("Client is closed")
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+        }
+        async with self._limit(url, timeout):
+            async with self._session.post(url, json=json_data, headers=headers, params=params) as response:
+                if response.status == 429:
+                    self._throttled(url, response)
+                return response.status
+
+    async def async_close(self):
+        """Stop accepting requests.
+
+        The underlying session is Home Assistant's shared one, it stays open
+        for the other integrations and is closed by Home Assistant itself.
+        """
+        self._closed = True
@@ -0,0 +1,166 @@
+"""Access token management for the Blossom integration."""
+import asyncio
+import logging
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import BlossomApiClient, BlossomApiError
+from .const import (
+    DOMAIN,
+    CONF_ACCESS_TOKEN,
+    CONF_REFRESH_TOKEN,
+    CONF_TOKEN_EXPIRY,
+    TOKEN_EXPIRY_MARGIN,
+    TOKEN_REFRESH_AHEAD,
+    TOKEN_SAVE_DELAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def token_data(response: dict) -> dict:
+    """Turn an Auth0 token response into the data we persist."""
+    expiry = dt_util.utcnow().timestamp() + response.get("expires_in", 3600)
+    return {
+        CONF_REFRESH_TOKEN: response.get("refresh_token"),
+        CONF_ACCESS_TOKEN: response.get("access_token"),
+        CONF_TOKEN_EXPIRY: expiry,
+    }
+
+
+def token_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Return the store of the tokens of a config entry."""
+    return Store(hass, version=1, key=f"{DOMAIN}_storage_{entry_id}")
+
+
+class BlossomTokenManager:
+    """Hand out access tokens, refreshing them at most once at a time.
+
+    Blossom uses refresh token rotation: every refresh token can be spent only
+    once. Refreshes are therefore serialized behind a lock, and the rotated
+    refresh token is persisted together with the access token and its expiry,
+    so a restart can keep using a still valid access token.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: BlossomApiClient, store: Store, data: dict | None):
+        """Initialize the manager with the persisted token data."""
+        self.hass = hass
+        self._client = client
+        self._store = store
+        data = data or {}
+        self.refresh_token = data.get(CONF_REFRESH_TOKEN)
+        self.access_token = data.get(CONF_ACCESS_TOKEN)
+        self.expiry = data.get(CONF_TOKEN_EXPIRY)  # POSIX timestamp
+        self._lock = asyncio.Lock()
+        self._unsub_refresh = None
+        self.refreshes = 0         # Successful token refreshes, for the metrics
+        self.refresh_failures = 0  # Failed token refreshes, for the metrics
+        self._schedule_refresh()
+
+    @property
+    def valid(self) -> bool:
+        """Return whether the access token can still be used."""
+        return bool(
+            self.access_token and self.expiry
+            and dt_util.utcnow().timestamp() < self.expiry - TOKEN_EXPIRY_MARGIN
+        )
+
+    @property
+    def expires(self) -> datetime | None:
+        """Return when the access token expires."""
+        return dt_util.utc_from_timestamp(self.expiry) if self.expiry else None
+
+    async def async_get_access_token(self) -> str | None:
+        """Return a valid access token, refreshing it first when needed."""
+        if self.valid:
+            return self.access_token
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if not self.valid:
+                await self._async_refresh()
+        return self.access_token
+
+    async def _async_refresh(self):
+        """Exchange the refresh token, must be called with the lock held."""
+        if not self.refresh_token:
+            _LOGGER.debug("No refresh token available, cannot refresh access token.")
+            self.access_token = None
+            return
+
+        try:
+            data = token_data(await self._client.async_request_token(self.refresh_token))
+        except BlossomApiError:
+            self.refresh_failures += 1
+            raise
+        self.refreshes += 1
+        self.refresh_token = data[CONF_REFRESH_TOKEN]
+        self.access_token = data[CONF_ACCESS_TOKEN]
+        self.expiry = data[CONF_TOKEN_EXPIRY]
+        _LOGGER.debug("Access token refreshed, valid until %s.", self.expires)
+
+        # Coalesce writes, the rotated refresh token must survive a reboot
+        self._store.async_delay_save(self._data_to_save, TOKEN_SAVE_DELAY)
+        self._schedule_refresh()
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the token data to persist."""
+        return {
+            CONF_REFRESH_TOKEN: self.refresh_token,
+            CONF_ACCESS_TOKEN: self.access_token,
+            CONF_TOKEN_EXPIRY: self.expiry,
+        }
+
+    @callback
+    def _schedule_refresh(self):
+        """Refresh proactively in the background, before the access token expires."""
+        if self._unsub_refresh:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+        if not self.expiry:
+            return
+        delay = max(0, self.expiry - TOKEN_REFRESH_AHEAD - dt_util.utcnow().timestamp())
+        self._unsub_refresh = async_call_later(self.hass, delay, self._handle_refresh)
+
+    @callback
+    def _handle_refresh(self, _now):
+        """Start a background refresh."""
+        self._unsub_refresh = None
+        self.hass.async_create_background_task(self._async_background_refresh(), "blossom_be token refresh")
+
+    async def _async_background_refresh(self):
+        """Refresh the access token ahead of time, polls retry inline on failure."""
+        try:
+            async with self._lock:
+                # Skip when a poll refreshed the token in the meantime
+                if self.expiry and self.expiry - TOKEN_REFRESH_AHEAD > dt_util.utcnow().timestamp():
+                    return
+                await self._async_refresh()
+        except BlossomApiError as err:
+            _LOGGER.warning("Background refresh of the access token failed: %s", err)
+
+    async def async_set_tokens(self, data: dict):
+        """Take over token data obtained elsewhere, e.g. by a config flow of the same account."""
+        async with self._lock:
+            self.refresh_token = data[CONF_REFRESH_TOKEN]
+            self.access_token = data[CONF_ACCESS_TOKEN]
+            self.expiry = data[CONF_TOKEN_EXPIRY]
+            await self._store.async_save(self._data_to_save())
+            self._schedule_refresh()
+
+    @callback
+    def async_invalidate(self):
+        """Forget the access token, e.g. after the API answered 401."""
+        self.access_token = None
+
+    async def async_shutdown(self):
+        """Stop refreshing and write pending token data to disk."""
+        if self._unsub_refresh:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+        if self.refresh_token:
+            await self._store.async_save(self._data_to_save())
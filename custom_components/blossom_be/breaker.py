@@ -0,0 +1,39 @@
+"""Circuit breaker of the Blossom endpoints."""
+
+
+class CircuitBreaker:
+    """Stop calling an endpoint that keeps failing, and retry it with backoff.
+
+    After threshold consecutive failures of a key the circuit opens: the key
+    is skipped for base_delay seconds, doubled on every further failure up
+    to max_delay. Once the delay has passed a single attempt is let through,
+    a success closes the circuit again.
+    """
+
+    def __init__(self, threshold: int, base_delay: float, max_delay: float):
+        """Initialize a breaker with every circuit closed."""
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._failures: dict = {}    # Key -> consecutive failures
+        self._open_until: dict = {}  # Key -> monotonic time the next attempt is allowed
+
+    def allow(self, key, now: float) -> bool:
+        """Return whether key may be called at monotonic time now."""
+        return now >= self._open_until.get(key, 0)
+
+    def success(self, key):
+        """Close the circuit of key."""
+        self._failures.pop(key, None)
+        self._open_until.pop(key, None)
+
+    def failure(self, key, now: float):
+        """Count a failure of key, opening its circuit after threshold failures."""
+        failures = self._failures[key] = self._failures.get(key, 0) + 1
+        if failures >= self.threshold:
+            delay = min(self.base_delay * 2 ** (failures - self.threshold), self.max_delay)
+            self._open_until[key] = now + delay
+
+    def open_circuits(self, now: float) -> dict:
+        """Return the seconds until the next attempt of every open circuit."""
+        return {key: round(until - now) for key, until in self._open_until.items() if until > now}
@@ -3,10 +3,21 @@ import logging
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
-from homeassistant.helpers.storage import Store
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from homeassistant.data_entry_flow import FlowResult
-from .const import DOMAIN, CONF_REFRESH_TOKEN
+from .api import (
+    CURRENT_URL,
+    RATE_LIMITS,
+    BlossomApiClient,
+    BlossomApiError,
+    BlossomAuthError,
+    account_unique_id,
+    parse_installations,
+)
+from .auth import token_data, token_store
+from .ratelimit import async_get_rate_limiters
+from .const import DOMAIN, CONF_REFRESH_TOKEN, CONF_INSTALLATIONS, CONF_RECORD_CASSETTE, CONF_TARGET_KWH, DEFAULT_INTERVALS, DEFAULT_TARGET_KWH
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,10 +26,15 @@ class BlossomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow handler."""
+        return BlossomOptionsFlow()
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step where the user inputs the refresh token."""
         errors = {}
-        store = Store(self.hass, version=1, key=f"{DOMAIN}_storage")
         if user_input is not None:
             refresh_token = user_input.get(CONF_REFRESH_TOKEN)
     
@@ -26,15 +42,31 @@ class BlossomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             is_valid, details = await self._validate_refresh_token(refresh_token)
     
             if is_valid:
-                #a refresh token is only valid 1 time, so store the new each time you refresh or validate
-                new_refresh_token = details.get("refresh_token")
+                #a refresh token is only valid 1 time, so keep the new one, with the access
+                #token so setup can reuse it. Setup moves them to the token store of the entry.
+                data = token_data(details)
+
+                # Resolve the installations once, polls reuse them from the entry
+                data.update(await self._resolve_identity(details.get("access_token")))
+
+                # One entry per account, the refresh tokens of an account rotate together.
+                # The account is only known once the token is spent, so an existing
+                # entry of the account continues with the rotated tokens.
+                unique_id = account_unique_id(data.get(CONF_INSTALLATIONS) or [])
+                if unique_id:
+                    await self.async_set_unique_id(unique_id)
+                    entry = next(
+                        (entry for entry in self._async_current_entries(include_ignore=False) if entry.unique_id == unique_id),
+                        None,
+                    )
+                    if entry is not None:
+                        await self._async_hand_over_tokens(entry, token_data(details))
+                        return self.async_abort(reason="already_configured")
 
-                #Save the new refresh token securely
-                await store.async_save({CONF_REFRESH_TOKEN: new_refresh_token})    
                 # Create the config entry
                 return self.async_create_entry(
                     title="Blossom Integration",
-                    data={CONF_REFRESH_TOKEN: new_refresh_token}
+                    data=data
                 )
             else:
                 # Use detailed error message from the server response
@@ -49,31 +81,72 @@ class BlossomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors
         )
 
+    async def _async_hand_over_tokens(self, entry: config_entries.ConfigEntry, tokens: dict):
+        """Give the tokens to an existing entry, its own refresh token may be the one just spent."""
+        coordinator = self.hass.data.get(DOMAIN, {}).get(entry.entry_id)
+        if coordinator is not None:
+            await coordinator.tokens.async_set_tokens(tokens)
+            return
+        await token_store(self.hass, entry.entry_id).async_save(tokens)
+        if entry.state in (config_entries.ConfigEntryState.SETUP_ERROR, config_entries.ConfigEntryState.SETUP_RETRY):
+            self.hass.config_entries.async_schedule_reload(entry.entry_id)
+
     async def _validate_refresh_token(self, refresh_token):
         """Validate the provided refresh token by fetching an access token."""
-        import aiohttp
-    
-        url = "https://blossom-production.eu.auth0.com/oauth/token"
-        payload = {
-            "grant_type": "refresh_token",
-            "client_id": "RTofmsbiLPSlisRHtIFohGRPBcGgrIrs",
-            "refresh_token": refresh_token,
-        }
-    
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(url, json=payload) as resp:
-                    response_data = await resp.json()
-    
-                    if resp.status == 200:
-                        return True, response_data  # Access token retrieved successfully
-                    else:
-                        # Return failure and the server's error response                  
-                        _LOGGER.error("Failed to validate refresh token. Status: %s.", resp.status)
-                        return False, response_data
-            except aiohttp.ClientError as e:
-                # Handle network errors
-                return False, {"error": "network_error", "details": str(e)}
-    
-        # Generic failure fallback
-        return False, {"error": "unknown_error"}
+        client = BlossomApiClient(
+            async_get_clientsession(self.hass), async_get_rate_limiters(self.hass, RATE_LIMITS), "config_flow"
+        )
+        try:
+            # Access token retrieved successfully
+            return True, await client.async_request_token(refresh_token)
+        except BlossomAuthError as e:
+            # Return failure and the server's error response
+            _LOGGER.error("Failed to validate refresh token. Status: %s.", e.status)
+            return False, e.data
+        except BlossomApiError as e:
+            # Handle network errors
+            return False, {"error": "network_error", "details": str(e)}
+
+    async def _resolve_identity(self, access_token):
+        """Return the installations with their member ids, or nothing if they can't be fetched yet."""
+        client = BlossomApiClient(
+            async_get_clientsession(self.hass), async_get_rate_limiters(self.hass, RATE_LIMITS), "config_flow"
+        )
+        try:
+            status, current_data, _ = await client.async_get(CURRENT_URL, access_token)
+        except Exception as e:
+            _LOGGER.warning("Could not fetch /current during setup: %s", e)
+            return {}
+        if status != 200:
+            _LOGGER.warning("Could not fetch /current during setup: HTTP %s", status)
+            return {}
+
+        installations = parse_installations(current_data)
+        if not installations:
+            return {}
+        return {CONF_INSTALLATIONS: installations}
+
+
+class BlossomOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options of the Blossom integration."""
+
+    async def async_step_init(self, user_input=None):
+        """Manage the refresh interval of each endpoint, in minutes, the target energy and recording."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Required(option, default=options.get(option, default)): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                )
+                for option, default in DEFAULT_INTERVALS.items()
+            } | {
+                vol.Required(CONF_TARGET_KWH, default=options.get(CONF_TARGET_KWH, DEFAULT_TARGET_KWH)): vol.All(
+                    vol.Coerce(float), vol.Range(min=1)
+                ),
+                vol.Optional(CONF_RECORD_CASSETTE, default=options.get(CONF_RECORD_CASSETTE, False)): bool,
+            }),
+        )
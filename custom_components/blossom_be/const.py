@@ -8,3 +8,70 @@ ICON = "mdi:currency-eur"
 COMPONENT_TITLE = "Blossom be"
 
 CONF_REFRESH_TOKEN = "refresh_token"
+CONF_ACCESS_TOKEN = "access_token"
+CONF_TOKEN_EXPIRY = "token_expiry"
+CONF_INSTALLATIONS = "installations"
+CONF_MEMBER_ID = "member_id"
+CONF_INSTALLATION_ID = "installation_id"
+
+# Timeouts in seconds: per endpoint call, and for one complete update cycle
+REQUEST_TIMEOUT = 10
+DEVICES_REQUEST_TIMEOUT = 20
+UPDATE_DEADLINE = 45
+
+# Refresh interval per endpoint in minutes, configurable through the options flow
+CONF_SET_POINTS_INTERVAL = "set_points_interval"
+CONF_SESSION_INTERVAL = "session_interval"
+CONF_CONSUMPTION_INTERVAL = "consumption_interval"
+CONF_HEMS_INTERVAL = "hems_interval"
+CONF_DEVICES_INTERVAL = "devices_interval"
+
+DEFAULT_INTERVALS = {
+    CONF_SET_POINTS_INTERVAL: 1,
+    CONF_SESSION_INTERVAL: 1,
+    CONF_CONSUMPTION_INTERVAL: 15,
+    CONF_HEMS_INTERVAL: 360,
+    CONF_DEVICES_INTERVAL: 360,
+}
+
+# Record the API responses to a cassette, see transport.py
+CONF_RECORD_CASSETTE = "record_cassette"
+
+# Session energy in kWh to estimate the remaining charging time to, see rates.py
+CONF_TARGET_KWH = "target_kwh"
+DEFAULT_TARGET_KWH = 20
+
+# Adaptive polling in seconds: fast while charging, slow without a car, backoff on errors
+CHARGING_INTERVAL = 30
+IDLE_INTERVAL = 300
+MAX_BACKOFF_INTERVAL = 900
+# Consecutive failures after which an endpoint is skipped, and retried with backoff
+BREAKER_THRESHOLD = 3
+# Seconds after the last successful fetch of any endpoint before the update fails
+STALE_LIMIT = 1800
+# Random seconds added to every poll interval, keeps config entries from polling in step
+POLL_JITTER = 2
+
+# Seconds between the first polls of the config entries after a restart, plus a random jitter
+STARTUP_STAGGER = 2
+STARTUP_JITTER = 5
+
+# Delay in seconds before the last responses are written to disk, for a warm start
+SNAPSHOT_SAVE_DELAY = 60
+
+# Number of recent endpoint responses kept for the diagnostics download
+DIAGNOSTICS_HISTORY = 25
+# Seconds between state writes of the request metric sensors
+METRICS_UPDATE_INTERVAL = 60
+# Seconds between state writes of the derived power sensors, which drop while the kWh stand still
+RATES_UPDATE_INTERVAL = 60
+
+# Access tokens are treated as expired this many seconds early, and refreshed
+# in the background this many seconds before they expire.
+TOKEN_EXPIRY_MARGIN = 300
+TOKEN_REFRESH_AHEAD = 600
+# Delay in seconds before the rotated tokens are written to disk
+TOKEN_SAVE_DELAY = 10
+
+# Seconds to wait for more mode changes before sending the last one
+MODE_COMMAND_DELAY = 1
@@ -1,216 +1,615 @@
+import asyncio
 import logging
-import aiohttp
 import json
-from datetime import timedelta, datetime
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.core import HomeAssistant
-from .const import DOMAIN, CONF_REFRESH_TOKEN
+import random
+import time
+from collections import deque
+from datetime import timedelta
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .api import (
+    AUTH_URL,
+    BlossomApiClient,
+    BlossomApiError,
+    BlossomAuthError,
+    IDENTITY_ERRORS,
+    CONSUMPTION_URL,
+    CURRENT_URL,
+    DEVICES_URL,
+    HEMS_URL,
+    SESSION_URL,
+    SET_POINTS_URL,
+    UPDATE_MODE_URL,
+    parse_installations,
+)
+from .auth import BlossomTokenManager
+from .breaker import CircuitBreaker
+from .metrics import BlossomMetrics
+from .models import PARSERS, DeviceIndex, InstallationData, to_json
+from .const import (
+    DOMAIN,
+    CONF_INSTALLATION_ID,
+    CONF_INSTALLATIONS,
+    CONF_MEMBER_ID,
+    CONF_CONSUMPTION_INTERVAL,
+    CONF_DEVICES_INTERVAL,
+    CONF_HEMS_INTERVAL,
+    CONF_SESSION_INTERVAL,
+    CONF_SET_POINTS_INTERVAL,
+    BREAKER_THRESHOLD,
+    CHARGING_INTERVAL,
+    DEFAULT_INTERVALS,
+    DIAGNOSTICS_HISTORY,
+    DEVICES_REQUEST_TIMEOUT,
+    IDLE_INTERVAL,
+    MAX_BACKOFF_INTERVAL,
+    MODE_COMMAND_DELAY,
+    POLL_JITTER,
+    REQUEST_TIMEOUT,
+    SNAPSHOT_SAVE_DELAY,
+    STALE_LIMIT,
+    UPDATE_DEADLINE,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-# API endpoints
-CURRENT_URL = "https://api.blossom.be/api/users/current"
-SET_POINTS_URL = "https://api.blossom.be/api/hems/set-points"
-HEMS_URL = "https://api.blossom.be/api/hems"
-CONSUMPTION_URL = "https://api.blossom.be/api/hems/energy-consumption"
-UPDATE_MODE_URL = "https://api.blossom.be/api/hems/set-points"
-SESSION_URL = "https://api.blossom.be/api/charging-session/employee/active"
-DEVICES_URL = "https://api.blossom.be/api/optimile/devices"
-AUTH_URL = "https://blossom-production.eu.auth0.com/oauth/token"
-CLIENT_ID = "RTofmsbiLPSlisRHtIFohGRPBcGgrIrs"
+# Endpoints refreshed by the coordinator: name -> (url, interval option, scoped to the installation)
+ENDPOINTS = {
+    "set_points": (SET_POINTS_URL, CONF_SET_POINTS_INTERVAL, True),
+    "session": (SESSION_URL, CONF_SESSION_INTERVAL, True),
+    "consumption": (CONSUMPTION_URL, CONF_CONSUMPTION_INTERVAL, True),
+    "hems": (HEMS_URL, CONF_HEMS_INTERVAL, True),
+    "devices": (DEVICES_URL, CONF_DEVICES_INTERVAL, False),
+}
+
+# The coordinator timer may fire slightly early, don't skip an endpoint for that.
+SCHEDULE_SLACK = 2
+
+class LazyJson:
+    """Pretty print a payload only when the log record is actually emitted."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self) -> str:
+        return json.dumps(to_json(self.data), indent=2)
+
+# Charge point states (deviceStatus) that drive the adaptive poll rate
+CHARGING_STATES = ("charging", "preparing")
+IDLE_STATES = ("available",)
 
 class BlossomDataUpdateCoordinator(DataUpdateCoordinator):
     """Fetch data from the Blossom API."""
     
-    def __init__(self, hass: HomeAssistant, refresh_token: str):
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry, client: BlossomApiClient, tokens: BlossomTokenManager):
         """Initialize the coordinator."""
+        self.options = dict(config_entry.options)
+        # Refresh interval per endpoint in seconds
+        self.intervals = {
+            name: 60 * config_entry.options.get(option, DEFAULT_INTERVALS[option])
+            for name, (_, option, _) in ENDPOINTS.items()
+        }
+        # Interval of the fastest tier, the adaptive poll rate is derived from it
+        self.base_interval = min(self.intervals.values())
         super().__init__(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name=f"{DOMAIN}_coordinator",
-            update_interval=timedelta(minutes=1),
+            # Only notify listeners when the returned snapshot differs from the previous one
+            always_update=False,
+            # Tick at the rate of the fastest endpoint, slower ones are skipped until due
+            update_interval=timedelta(seconds=self.base_interval),
         )
         _LOGGER.debug("Init coordinator")
         self.hass = hass
-        self.refresh_token = refresh_token
-        self.access_token = None
-        self.token_expiry = None
-        self.hems_last_fetched = None  # Initialize HEMS fetch timestamp
-        self.hems_data = None          # Initialize HEMS data
-        self.set_points_data = None    # Initialize set_points data
-        self.consumption_data = None
-        self.session_data = None
-        self.devices_data = None
-        self.member_id = None  # Will hold the memberId from /current
-        self.installation_id = None  # Will hold the installationId from /current
+        self.client = client
+        self.tokens = tokens
+        # Responses are keyed by (installation id, endpoint), the installation id
+        # is None for endpoints that are not scoped to an installation.
+        self.endpoint_data = {}      # Parsed snapshot of the last response per endpoint
+        self.endpoint_fetched = {}   # Monotonic time of the last fetch per endpoint name
+        self.endpoint_validators = {}  # (etag, last modified, digest) of the last response per endpoint
+        self.endpoint_updated = {}   # UTC time of the last successful fetch per endpoint
+        self.device_index = DeviceIndex(None)  # Charging points and energy components by id
+        # Endpoints that keep failing are skipped for a while, their last good data is kept
+        self.breaker = CircuitBreaker(BREAKER_THRESHOLD, self.base_interval, MAX_BACKOFF_INTERVAL)
+        self._refreshing = set()     # Endpoints with a background refresh in flight
+        # Polls and mode changes hold this lock, so a write is never overtaken by a stale poll
+        self._lock = asyncio.Lock()
+        self.pending_modes = {}      # Queued (mode, cap) per installation, last one wins
+        self._mode_tasks = {}        # Task sending the queued mode per installation
+        self._failures = 0           # Consecutive failed updates, drives the backoff
+        # Recent responses with their timing, for the diagnostics download
+        self.history = deque(maxlen=DIAGNOSTICS_HISTORY)
+        # Latency, status and size counters per endpoint
+        self.metrics = BlossomMetrics()
+        # State writes of the entities, and those skipped because nothing changed
+        self.state_writes = {"performed": 0, "skipped": 0}
+        # Installations of the account, resolved once from /current and kept with
+        # the config entry. All of them share this coordinator's token and poll cycle.
+        self.installations = list(config_entry.data.get(CONF_INSTALLATIONS) or [])
+        self._identity_stale = False  # Set when an endpoint rejects the stored ids
+        self.session_history = None  # BlossomSessionHistory, set up with the config entry
+        self.charging_rates = None   # BlossomChargingRates, set up with the config entry
+        # Last responses persisted for a warm start after a restart
+        self._snapshot_store = Store(hass, 1, f"{DOMAIN}_snapshot_{config_entry.entry_id}")
+        self._snapshot_pending = False
 
 
+    @property
+    def access_token(self) -> str | None:
+        """Return the current access token."""
+        return self.tokens.access_token
+
     async def async_refresh_access_token(self):
-        """Refresh the access token only if it has expired."""
-    
-        # Check if we already have a valid access token
-        if self.access_token and self.token_expiry and datetime.utcnow() < self.token_expiry:
-            _LOGGER.debug("Access token still valid.")
-            return True
-        
-        if not self.refresh_token:
-            _LOGGER.debug("No refresh token available, cannot refresh access token.")
-            return None
-
-        payload = {
-            "grant_type": "refresh_token",
-            "client_id": CLIENT_ID,
-            "refresh_token": self.refresh_token,
+        """Make sure a valid access token is available, refreshing it only if it has expired."""
+        try:
+            return await self.tokens.async_get_access_token() is not None
+        except BlossomAuthError as err:
+            _LOGGER.error("Failed to refresh access token: %s", err.status)
+            raise Exception("Authentication error") from err
+        except BlossomApiError as err:
+            # Auth0 unreachable or rate limited, back off and try again later
+            _LOGGER.warning("Failed to refresh access token: %s", err)
+            return False
+
+    async def _async_fetch(self, name: str, url: str, params: dict | None = None,
+                           timeout: float = REQUEST_TIMEOUT, validators: tuple | None = None):
+        """Fetch one endpoint within its own timeout.
+
+        Return a (status, data, validators) tuple like the API client does,
+        with a None status when the request failed or timed out. The json of
+        the endpoints in PARSERS is parsed into its snapshot. The timeout
+        starts when the rate limit lets the request go, waiting for it only
+        counts against the deadline of the whole update.
+        """
+        started = time.monotonic()
+        try:
+            status, data, validators = await self.client.async_get(url, self.access_token, params, validators, timeout)
+            if data is not None and name in PARSERS:
+                # Keep only the fields we use, the raw json is dropped here
+                data = PARSERS[name][0](data)
+        except TimeoutError:
+            _LOGGER.error("Timeout fetching %s after %s seconds.", name, timeout)
+            self._record(name, started, "timeout")
+            return None, None, None
+        except Exception as err:
+            _LOGGER.error("Error fetching %s: %s", name, err)
+            self._record(name, started, repr(err))
+            return None, None, None
+
+        if name == "/current" and isinstance(data, dict):
+            # The account's ids and names are stored with the config entry, keep only their counts
+            self._record(name, started, status, {key: len(data.get(key) or []) for key in ("members", "installations")})
+        else:
+            self._record(name, started, status, data)
+
+        if status not in (200, 304):
+            _LOGGER.error("Failed to fetch %s: HTTP %s", name, status)
+            if params and status in IDENTITY_ERRORS:
+                self._identity_stale = True
+            if status == 401:
+                # Force a new access token on the next update
+                self.tokens.async_invalidate()
+        return status, data, validators
+
+    def _record(self, name: str, started: float, status, data=None):
+        """Remember a response and its duration in the diagnostics ring buffer and the metrics."""
+        duration = time.monotonic() - started
+        self.history.append({
+            "endpoint": name,
+            "time": dt_util.utcnow().isoformat(),
+            "duration": round(duration, 3),
+            "status": status,
+            "payload": data,
+        })
+        self.metrics.record(name, duration, status if isinstance(status, int) or status == "timeout" else "error")
+
+    def metrics_snapshot(self) -> dict:
+        """Return the request metrics per endpoint, the token refresh and the state write counts."""
+        urls = {"/current": CURRENT_URL} | {name: url for name, (url, _, _) in ENDPOINTS.items()}
+        return {
+            "endpoints": {
+                name: metrics.snapshot(self.client.bytes_received.get(urls.get(name), 0))
+                for name, metrics in self.metrics.endpoints.items()
+            },
+            "token_refreshes": self.tokens.refreshes,
+            "token_refresh_failures": self.tokens.refresh_failures,
+            "state_writes": dict(self.state_writes),
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(AUTH_URL, json=payload) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    self.access_token = data.get("access_token")
-                    self.refresh_token = data.get("refresh_token")
-                    self.token_expiry = datetime.utcnow() + timedelta(seconds=data.get("expires_in", 3600))
-                    # Subtract 5 minutes for buffer
-                    self.token_expiry -= timedelta(minutes=5)
-                    
-                    # Store new refresh token for persistence after reboot.
-                    store = Store(self.hass, version=1, key=f"{DOMAIN}_storage")
-                    await store.async_save({CONF_REFRESH_TOKEN: self.refresh_token})
-                    _LOGGER.debug("Refresh token stored to store.")
+
+    async def _async_resolve_identity(self) -> bool:
+        """Look up the installations with their member ids and store them with the config entry."""
+        _, current_data, _ = await self._async_fetch("/current", CURRENT_URL)
+        if current_data is None:
+            return False
+
+        installations = parse_installations(current_data)
+        if not installations:
+            _LOGGER.error("No members or installations found in /current response.")
+            return False
+
+        # Keep the order of installations we already know, so the first one
+        # keeps its (legacy) entity ids.
+        known = [item[CONF_INSTALLATION_ID] for item in self.installations]
+        installations.sort(key=lambda item: known.index(item[CONF_INSTALLATION_ID])
+                           if item[CONF_INSTALLATION_ID] in known else len(known))
+        _LOGGER.debug("Installations retrieved: %s", [item[CONF_INSTALLATION_ID] for item in installations])
+
+        self._identity_stale = False
+        if installations != self.installations:
+            self.installations = installations
+            self.hass.config_entries.async_update_entry(
+                self.config_entry,
+                data={**self.config_entry.data, CONF_INSTALLATIONS: installations},
+            )
+        return True
+
+    async def _async_fetch_endpoints(self, names: list[str], started: float,
+                                     installations: list[dict] | None = None) -> tuple[bool, bool]:
+        """Fetch the given endpoints for every installation concurrently and store their responses.
+
+        When installations is given, only the installation scoped endpoints of
+        those installations are fetched. Endpoints with an open circuit are
+        skipped. A failed endpoint keeps its last good response, and only
+        the endpoints that answered for every installation count as fetched.
+
+        Return whether any data changed and whether any endpoint answered.
+        """
+        responses = await self._async_request_endpoints(names, started, installations)
+        return self._store_responses(responses, started, installations)
+
+    async def _async_request_endpoints(self, names: list[str], started: float,
+                                       installations: list[dict] | None = None) -> list[tuple]:
+        """Fetch the given endpoints concurrently, return their (key, response) pairs.
+
+        The endpoints and installations are selected as for _async_fetch_endpoints.
+        """
+        keys, requests = [], []
+        for name in names:
+            url, _, scoped = ENDPOINTS[name]
+            timeout = DEVICES_REQUEST_TIMEOUT if name == "devices" else REQUEST_TIMEOUT
+            if installations is not None:
+                targets = installations if scoped else []
+            else:
+                targets = self.installations if scoped else [None]
+            for installation in targets:
+                if installation is None:
+                    key, params = (None, name), None
                 else:
-                    _LOGGER.error("Failed to refresh access token: %s", response.status)
-                    raise Exception("Authentication error")
+                    key = (installation[CONF_INSTALLATION_ID], name)
+                    params = {
+                        "memberId": installation[CONF_MEMBER_ID],
+                        "installationId": installation[CONF_INSTALLATION_ID],
+                    }
+                if not self.breaker.allow(key, started):
+                    _LOGGER.debug("Skipping %s for installation %s, it keeps failing.", key[1], key[0])
+                    continue
+                keys.append(key)
+                requests.append(self._async_fetch(name, url, params, timeout, self.endpoint_validators.get(key)))
+        return list(zip(keys, await asyncio.gather(*requests)))
+
+    @callback
+    def _store_responses(self, responses: list[tuple], started: float,
+                         installations: list[dict] | None = None) -> tuple[bool, bool]:
+        """Store the responses of _async_request_endpoints, return whether data changed and any answered."""
+        changed = succeeded = False
+        failed = set()
+        for key, (status, data, validators) in responses:
+            if status not in (200, 304):
+                # Keep serving the last good response
+                self.breaker.failure(key, time.monotonic())
+                failed.add(key[1])
+                continue
+            self.breaker.success(key)
+            self.endpoint_updated[key] = dt_util.utcnow()
+            succeeded = True
+
+            # A 304 (also returned by the client for a body with the same digest),
+            # or the same validators on a 200, means nothing changed
+            if status == 304 or validators == self.endpoint_validators.get(key):
+                _LOGGER.debug("%s_data unchanged for installation %s.", key[1], key[0])
+                continue
+
+            self.endpoint_data[key] = data
+            self.endpoint_validators[key] = validators
+            changed = True
+            _LOGGER.debug("%s_data refreshed successfully for installation %s:\n%s", key[1], key[0], LazyJson(data))
+
+        if installations is None:
+            # A failed endpoint stays due, it is retried on the next update
+            # until its circuit opens and the breaker's backoff takes over
+            for name in {key[1] for key, _ in responses} - failed:
+                self.endpoint_fetched[name] = started
+        return changed, succeeded
+
+    async def _async_refresh_in_background(self, names: list[str], started: float):
+        """Refresh slow endpoints without holding up the regular update.
+
+        The requests run alongside the polls, their responses are stored
+        under the lock like those of the polls and mode changes.
+        """
+        try:
+            try:
+                async with asyncio.timeout(UPDATE_DEADLINE):
+                    responses = await self._async_request_endpoints(names, started)
+            except TimeoutError:
+                _LOGGER.error("Background refresh of %s did not finish within %s seconds.", names, UPDATE_DEADLINE)
+                return
+
+            async with self._lock:
+                changed, _ = self._store_responses(responses, started)
+                if changed and self.data is not None:
+                    self.data = self._build_data()
+                    self.async_update_listeners()
+        finally:
+            # Only now may a poll schedule these endpoints again
+            self._refreshing.difference_update(names)
+
+    async def async_restore_snapshot(self) -> bool:
+        """Restore the responses persisted before the last shutdown, return whether there were any.
+
+        The restored endpoints keep the time they were fetched, so slow
+        tiers are not fetched again before they are due and the data is
+        reported as stale when the API stays unreachable.
+        """
+        stored = await self._snapshot_store.async_load()
+        if not stored or not self.installations:
+            return False
+
+        try:
+            items = [
+                (item, PARSERS[item["endpoint"]][1](item["data"]) if item["data"] is not None else None)
+                for item in stored["endpoints"]
+                if item["endpoint"] in ENDPOINTS
+            ]
+        except (KeyError, TypeError) as err:
+            _LOGGER.warning("Ignoring the persisted data, it can't be restored: %s", err)
+            return False
+
+        now, utcnow = time.monotonic(), dt_util.utcnow()
+        for item, data in items:
+            key = (item[CONF_INSTALLATION_ID], item["endpoint"])
+            self.endpoint_data[key] = data
+            etag, last_modified, digest = item["validators"] or (None, None, None)
+            self.endpoint_validators[key] = (etag, last_modified, bytes.fromhex(digest) if digest else None)
+            updated = dt_util.parse_datetime(item["updated"]) if item["updated"] else None
+            if updated is None:
+                continue
+            self.endpoint_updated[key] = updated
+            # The oldest response of an endpoint decides when it is due again
+            fetched = now - (utcnow - updated).total_seconds()
+            self.endpoint_fetched[key[1]] = min(fetched, self.endpoint_fetched.get(key[1], fetched))
+        # Endpoints of installations that were not in the snapshot are fetched right away
+        for key in self._endpoint_keys():
+            if key not in self.endpoint_data:
+                self.endpoint_fetched.pop(key[1], None)
+
+        _LOGGER.debug("Restored the data of %s, saved %s.", len(self.endpoint_data), stored["saved"])
+        self.async_set_updated_data(self._build_data())
         return True
 
+    def _endpoint_keys(self) -> list[tuple]:
+        """Return the key of every endpoint of every installation."""
+        return [
+            (installation[CONF_INSTALLATION_ID] if scoped else None, name)
+            for name, (_, _, scoped) in ENDPOINTS.items()
+            for installation in (self.installations if scoped else [None])
+        ]
+
+    @callback
+    def _schedule_snapshot_save(self):
+        """Persist the responses, at most once per SNAPSHOT_SAVE_DELAY."""
+        if not self._snapshot_pending:
+            self._snapshot_pending = True
+            self._snapshot_store.async_delay_save(self._snapshot_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _snapshot_to_save(self) -> dict:
+        """Return the responses to persist."""
+        self._snapshot_pending = False
+        endpoints = []
+        for key, data in self.endpoint_data.items():
+            etag, last_modified, digest = self.endpoint_validators.get(key) or (None, None, None)
+            updated = self.endpoint_updated.get(key)
+            endpoints.append({
+                CONF_INSTALLATION_ID: key[0],
+                "endpoint": key[1],
+                "data": to_json(data),
+                "updated": updated.isoformat() if updated else None,
+                "validators": [etag, last_modified, digest.hex() if digest else None],
+            })
+        return {"saved": dt_util.utcnow().isoformat(), "endpoints": endpoints}
+
+    async def async_flush_snapshot(self):
+        """Write the responses to disk right away."""
+        await self._snapshot_store.async_save(self._snapshot_to_save())
+
+    def _build_data(self) -> dict[str, InstallationData]:
+        """Assemble coordinator.data, keyed by installation id, from the last response of each endpoint."""
+        self._schedule_snapshot_save()
+        devices = self.endpoint_data.get((None, "devices"))
+        if devices is not self.device_index.devices:
+            self.device_index = DeviceIndex(devices)
+        return {
+            installation_id: InstallationData(
+                set_points=self.endpoint_data.get((installation_id, "set_points")),
+                hems=self.endpoint_data.get((installation_id, "hems")),
+                consumption=self.endpoint_data.get((installation_id, "consumption")),
+                session=self.endpoint_data.get((installation_id, "session")),
+                devices=devices,
+            )
+            for installation_id in (installation[CONF_INSTALLATION_ID] for installation in self.installations)
+        }
+
     async def _async_update_data(self):
+        try:
+            # The whole cycle shares one deadline, so a slow endpoint can never
+            # stall the coordinator or let polls pile up.
+            async with asyncio.timeout(UPDATE_DEADLINE), self._lock:
+                changed, succeeded = await self._async_update_all()
+        except TimeoutError:
+            _LOGGER.error("Update from Blossom did not finish within %s seconds.", UPDATE_DEADLINE)
+            changed = succeeded = False
+
+        # Serve the last good data of every endpoint, also when this cycle failed.
+        # Hand back the same snapshot when nothing changed, so listeners are not notified.
+        data = self.data if not changed and self.data is not None else self._build_data()
+        self._failures = 0 if succeeded else self._failures + 1
+        self.update_interval = timedelta(seconds=self._next_interval(data))
+        _LOGGER.debug("Next update in %.0f seconds.", self.update_interval.total_seconds())
+
+        last_success = max(self.endpoint_updated.values(), default=None)
+        if last_success is None or dt_util.utcnow() - last_success > timedelta(seconds=STALE_LIMIT):
+            raise UpdateFailed(f"No data could be fetched from Blossom since {last_success or 'startup'}")
+        return data
+
+    def _next_interval(self, data: dict | None) -> float:
+        """Derive the next poll interval from the charging state, in seconds."""
+        # Never poll before a Retry-After of Blossom or Auth0 has passed
+        retry_after = max(self.client.retry_after(CURRENT_URL), self.client.retry_after(AUTH_URL))
+        if self._failures:
+            # Exponential backoff with full jitter
+            backoff = min(self.base_interval * 2 ** self._failures, MAX_BACKOFF_INTERVAL)
+            return max(random.uniform(self.base_interval, max(backoff, self.base_interval)), retry_after)
+
+        # Poll at the rate of the busiest installation
+        interval = min(
+            (self._installation_interval(installation_data) for installation_data in (data or {}).values()),
+            default=self.base_interval,
+        )
+        return max(interval + random.uniform(0, POLL_JITTER), retry_after)
+
+    def _installation_interval(self, installation_data: InstallationData) -> float:
+        """Derive the poll interval for a single installation, in seconds."""
+        charging_session = installation_data.session
+        if not charging_session:
+            return max(self.base_interval, IDLE_INTERVAL)
+
+        device_status = str(charging_session.device_status or "").split(";")[0].strip().lower()
+        session_status = str(charging_session.status or "").lower()
+        if device_status in CHARGING_STATES:
+            return min(self.base_interval, CHARGING_INTERVAL)
+        if session_status == "in_progress":
+            # Session running but paused, e.g. waiting for solar power
+            return self.base_interval
+        if device_status in IDLE_STATES:
+            return max(self.base_interval, IDLE_INTERVAL)
+        return self.base_interval
+
+    async def _async_update_all(self) -> tuple[bool, bool]:
+        """Refresh the endpoints that are due, return whether data changed and whether any endpoint answered."""
         # Ensure the access token is valid
         if not await self.async_refresh_access_token():
             _LOGGER.error("Failed to refresh access token.")
-            return None
+            return False, False
         
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-        now = datetime.utcnow()
+        started = time.monotonic()
         _LOGGER.debug("Coordinator: update_data triggered.")
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                # First, call /current to get the memberId
-                async with session.get(CURRENT_URL, headers=headers) as current_response:
-                    if current_response.status == 200:
-                        current_data = await current_response.json()
-                        members = current_data.get("members", [])
-                        if members:
-                            self.member_id = members[0].get("id")
-                            _LOGGER.debug("Member ID retrieved: %s", self.member_id)
-                        else:
-                            _LOGGER.error("No members found in /current response.")
-                            self.member_id = None
-                            
-                        installations = current_data.get("installations", [])
-                        if installations:
-                            self.installation_id = installations[0].get("id")
-                            _LOGGER.debug("Installation ID retrieved: %s", self.installation_id)
-                        else:
-                            _LOGGER.error("No installations found in /current response.")
-                            self.installation_id = None
-                    else:
-                        _LOGGER.error("Failed to fetch /current endpoint: %s", current_response.status)
-                        self.member_id = None
-                        self.installation_id = None
-
-                # If we couldn't retrieve a member id, abort further API calls
-                if not self.member_id:
-                    _LOGGER.error("Member ID is not available. Skipping further API calls.")
-                    return None
-                    
-                # If we couldn't retrieve a installation id, abort further API calls
-                if not self.installation_id:
-                    _LOGGER.error("Installation ID is not available. Skipping further API calls.")
-                    return None
-
-                # Prepare query parameter for subsequent calls
-                params = {
-                    "memberId": self.member_id,
-                    "installationId": self.installation_id
-                }
-
-                # Fetch set_points
-                async with session.get(SET_POINTS_URL, headers=headers, params=params) as response:
-                    self.set_points_data = await response.json() if response.status == 200 else None
-                    _LOGGER.debug("set_points_data refreshed successfully:\n%s", json.dumps(self.set_points_data, indent=2))
-
-
-                # Fetch consumption
-                async with session.get(CONSUMPTION_URL, headers=headers, params=params) as consumption_response:
-                    self.consumption_data = await consumption_response.json() if consumption_response.status == 200 else None
-                    _LOGGER.debug("consumption_data refreshed successfully:\n%s", json.dumps(self.consumption_data, indent=2))
-
-                # Fetch session
-                async with session.get(
-                    SESSION_URL, headers=headers, params=params
-                ) as session_response:
-                    if session_response.status == 200:
-                        session_json = await session_response.json()
-                        self.session_data = session_json[0] if session_json else None
-                    else:
-                        _LOGGER.error(
-                            "Failed to fetch session data: HTTP %s",
-                            session_response.status,
-                        )
-                        self.session_data = None
-                
-                    _LOGGER.debug(
-                        "session_data refreshed:\n%s",
-                        json.dumps(self.session_data, indent=2),
-                    )
-
-                # Fetch HEMS and devices if cache expired
-                if not self.hems_last_fetched or (now - self.hems_last_fetched).seconds > 3600:
-                    async with session.get(HEMS_URL, headers=headers, params=params) as hems_response:
-                        self.hems_data = await hems_response.json() if hems_response.status == 200 else None
-                        self.hems_last_fetched = now
-                        _LOGGER.debug("hems_data refreshed successfully:\n%s", json.dumps(self.hems_data, indent=2))
-
-                    async with session.get(DEVICES_URL, headers=headers) as devices_response:
-                        self.devices_data = await devices_response.json() if devices_response.status == 200 else None
-                        _LOGGER.debug("devices_data refreshed successfully:\n%s", json.dumps(self.devices_data, indent=2))
-                else:
-                    _LOGGER.debug("hems/devices data not refreshed; cache is still valid. Last refresh %s seconds ago.",
-                                  (now - self.hems_last_fetched).seconds)
-    
-                return {
-                    "set_points": self.set_points_data,
-                    "hems": self.hems_data,
-                    "consumption": self.consumption_data,
-                    "home-charging-session": self.session_data,
-                    "devices": self.devices_data
-                }
-            except Exception as err:
-                _LOGGER.error("Error fetching data from Blossom: %s", err)
-                return None
-
-    async def update_mode(self, mode: str, cap_value: int = None):
-        """Update the mode of the Blossom charging station."""
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        params = {}
-        if self.member_id:
-            params["memberId"] = self.member_id
-        if self.installation_id:
-            params["installationId"] = self.installation_id        
+        try:
+            # Only call /current when the ids are unknown or were rejected by an endpoint
+            if self._identity_stale or not self.installations:
+                if not await self._async_resolve_identity():
+                    _LOGGER.error("Member or installation ID is not available. Skipping further API calls.")
+                    return False, False
+
+            # Endpoints that were never fetched or belong to the fastest tier are
+            # fetched inline, slower tiers that are due refresh in the background.
+            inline, background = [], []
+            for name, interval in self.intervals.items():
+                last_fetched = self.endpoint_fetched.get(name)
+                if name in self._refreshing:
+                    continue
+                if last_fetched is None or interval <= self.base_interval:
+                    inline.append(name)
+                elif started - last_fetched >= interval - SCHEDULE_SLACK:
+                    background.append(name)
+
+            if background:
+                self._refreshing.update(background)
+                self.config_entry.async_create_background_task(
+                    self.hass,
+                    self._async_refresh_in_background(background, started),
+                    name=f"{DOMAIN} background refresh",
+                )
+
+            return await self._async_fetch_endpoints(inline, started)
+        except Exception as err:
+            _LOGGER.error("Error fetching data from Blossom: %s", err)
+            return False, False
+
+    def get_installation(self, installation_id: str) -> dict | None:
+        """Return the stored installation (with its member id) for an installation id."""
+        return next(
+            (item for item in self.installations if item[CONF_INSTALLATION_ID] == installation_id),
+            None,
+        )
+
+    async def async_queue_mode(self, installation_id: str, mode: str, cap_value: int = None):
+        """Queue a mode change and wait until the queue of the installation is sent.
+
+        Rapid successive changes collapse into the last one. The write is
+        ordered against polls, and afterwards only the set-points of the
+        installation are refreshed.
+        """
+        self.pending_modes[installation_id] = (mode, cap_value)
+        self.async_update_listeners()
+
+        task = self._mode_tasks.get(installation_id)
+        if task is None or task.done():
+            task = self._mode_tasks[installation_id] = self.config_entry.async_create_background_task(
+                self.hass,
+                self._async_send_modes(installation_id),
+                name=f"{DOMAIN} mode update",
+            )
+        await asyncio.shield(task)
+
+    async def _async_send_modes(self, installation_id: str):
+        """Send the last queued mode of an installation until the queue is empty."""
+        try:
+            await asyncio.sleep(MODE_COMMAND_DELAY)
+            while installation_id in self.pending_modes:
+                mode, cap_value = self.pending_modes[installation_id]
+                async with self._lock:
+                    await self.update_mode(installation_id, mode, cap_value)
+                    if self.pending_modes.get(installation_id) == (mode, cap_value):
+                        del self.pending_modes[installation_id]
+                    # Read back only what the write changed
+                    installation = self.get_installation(installation_id)
+                    if installation:
+                        await self._async_fetch_endpoints(["set_points"], time.monotonic(), [installation])
+        finally:
+            self.pending_modes.pop(installation_id, None)
+            self._mode_tasks.pop(installation_id, None)
+            if self.data is not None:
+                self.data = self._build_data()
+            self.async_update_listeners()
+
+    async def update_mode(self, installation_id: str, mode: str, cap_value: int = None):
+        """Update the mode of the Blossom charging station of an installation."""
+        params = {"installationId": installation_id}
+        installation = self.get_installation(installation_id)
+        if installation:
+            params["memberId"] = installation[CONF_MEMBER_ID]
             
         json_data = {"mode": mode}
         if cap_value:
             json_data["cap"] = cap_value
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(UPDATE_MODE_URL, json=json_data, headers=headers, params=params) as response:
-                    if response.status in (200, 201):
-                        _LOGGER.info("Successfully updated mode to %s.", mode)
-                    else:
-                        _LOGGER.error("Error updating mode: %s", response.status)
-            except Exception as err:
-                _LOGGER.error("Error sending mode update to Blossom: %s", err)
+        try:
+            async with asyncio.timeout(REQUEST_TIMEOUT):
+                await self.async_refresh_access_token()
+            status = await self.client.async_post(UPDATE_MODE_URL, self.access_token, json_data, params, REQUEST_TIMEOUT)
+            if status in (200, 201):
+                _LOGGER.info("Successfully updated mode to %s.", mode)
+            else:
+                _LOGGER.error("Error updating mode: %s", status)
+        except Exception as err:
+            _LOGGER.error("Error sending mode update to Blossom: %s", err)
@@ -0,0 +1,71 @@
+"""Diagnostics support for the Blossom integration."""
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .models import to_json
+from .const import DOMAIN, CONF_REFRESH_TOKEN, CONF_INSTALLATION_ID, CONF_MEMBER_ID
+
+TO_REDACT = {
+    CONF_REFRESH_TOKEN,
+    CONF_MEMBER_ID,
+    CONF_INSTALLATION_ID,
+    "access_token",
+    "memberId",
+    "installationId",
+    "email",
+    "firstName",
+    "lastName",
+    "first_name",
+    "last_name",
+    "phone",
+    "address",
+    "street",
+    "city",
+    "zip",
+    "latitude",
+    "longitude",
+    "iban",
+}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    timings = {}
+    for item in coordinator.history:
+        endpoint = timings.setdefault(item["endpoint"], {"count": 0, "last": None, "max": 0})
+        endpoint["count"] += 1
+        endpoint["last"] = item["duration"]
+        endpoint["max"] = max(endpoint["max"], item["duration"])
+
+    open_circuits = coordinator.breaker.open_circuits(time.monotonic())
+    # Staleness of every endpoint, and when failing ones are tried again
+    endpoints = []
+    for installation_id, name in coordinator.endpoint_updated.keys() | open_circuits.keys():
+        updated = coordinator.endpoint_updated.get((installation_id, name))
+        endpoints.append({
+            CONF_INSTALLATION_ID: installation_id,
+            "endpoint": name,
+            "updated": updated.isoformat() if updated else None,
+            "retry_in": open_circuits.get((installation_id, name)),
+        })
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "last_update_success": coordinator.last_update_success,
+        "update_interval": coordinator.update_interval.total_seconds(),
+        "timings": timings,
+        "endpoints": async_redact_data(endpoints, TO_REDACT),
+        "metrics": coordinator.metrics_snapshot(),
+        "history": async_redact_data(
+            [dict(item, payload=to_json(item["payload"])) for item in coordinator.history], TO_REDACT
+        ),
+    }
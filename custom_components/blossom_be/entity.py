@@ -0,0 +1,209 @@
+"""Base entity for the Blossom integration."""
+from collections.abc import Callable, Iterable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN, CONF_INSTALLATION_ID
+from .coordinator import BlossomDataUpdateCoordinator
+from .models import ChargingPoint, InstallationData
+
+# Keys of the entities from before multi-installation support, their unique
+# ids stay the bare key for the first installation
+LEGACY_UNIQUE_IDS = frozenset({
+    "peak_solar_capacity",
+    "electricity_contract",
+    "user_setting_cap_value",
+    "min_charge_rate",
+    "current_month_peak",
+    "monthly_energy_consumption",
+    "last_session_status",
+    "last_session_consumption",
+    "last_session_start",
+    "home_charging_status",
+    "energy_component_price",
+    "mode_selector",
+})
+
+
+class BlossomCoordinatorEntity(CoordinatorEntity[BlossomDataUpdateCoordinator]):
+    """Coordinator entity that only writes its state when it changed.
+
+    Most updates of the coordinator leave an entity's value as it was. The
+    rendered state, availability and attributes are compared with those of
+    the last write, and an unchanged entity skips the state machine write,
+    its event and recorder row. coordinator.state_writes counts both.
+    """
+
+    _state_fingerprint: tuple | None = None
+
+    def _fingerprint(self) -> tuple:
+        """Return what a state write would show."""
+        return self.available, self.state, self.state_attributes, self.extra_state_attributes
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the entity is added."""
+        await super().async_added_to_hass()
+        self._state_fingerprint = self._fingerprint()
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        """Write the state, unless it is the same as the last written one."""
+        fingerprint = self._fingerprint()
+        if fingerprint == self._state_fingerprint:
+            self.coordinator.state_writes["skipped"] += 1
+            return
+        self._state_fingerprint = fingerprint
+        self.coordinator.state_writes["performed"] += 1
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state when the coordinator update changed it."""
+        self.async_write_ha_state_if_changed()
+
+
+class BlossomEntity(BlossomCoordinatorEntity):
+    """Entity bound to one installation of the Blossom account."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator: BlossomDataUpdateCoordinator, installation: dict, key: str) -> None:
+        """Initialize the entity and its device."""
+        super().__init__(coordinator)
+        self.installation_id = installation[CONF_INSTALLATION_ID]
+        if self.installation_id == coordinator.installations[0][CONF_INSTALLATION_ID]:
+            # The first installation keeps the ids from before multi-installation support,
+            # entities added since are namespaced like those of the other installations
+            self._attr_unique_id = key if key in LEGACY_UNIQUE_IDS else f"{self.installation_id}_{key}"
+            self._attr_device_info = DeviceInfo(
+                identifiers={(DOMAIN, coordinator.config_entry.entry_id)},
+                manufacturer="Blossom",
+            )
+        else:
+            self._attr_unique_id = f"{self.installation_id}_{key}"
+            self._attr_device_info = DeviceInfo(
+                identifiers={(DOMAIN, self.installation_id)},
+                manufacturer="Blossom",
+                name=installation.get("name") or f"Blossom {self.installation_id}",
+            )
+
+    @property
+    def installation_data(self) -> InstallationData | None:
+        """Return the coordinator data of this entity's installation."""
+        return (self.coordinator.data or {}).get(self.installation_id)
+
+
+def async_setup_installation_entities(
+    coordinator: BlossomDataUpdateCoordinator,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    entity_factory: Callable[[dict], Iterable[Entity]],
+) -> None:
+    """Add the entities of every installation, and of installations discovered later on."""
+    known = set()
+
+    @callback
+    def _async_add_new_installations() -> None:
+        entities = []
+        for installation in coordinator.installations:
+            if installation[CONF_INSTALLATION_ID] not in known:
+                known.add(installation[CONF_INSTALLATION_ID])
+                entities.extend(entity_factory(installation))
+        if entities:
+            async_add_entities(entities)
+
+    _async_add_new_installations()
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_new_installations))
+
+
+def charging_point_identifier(charging_point_id: str) -> tuple[str, str]:
+    """Return the device registry identifier of a charging point."""
+    return DOMAIN, f"charging_point_{charging_point_id}"
+
+
+class BlossomChargingPointEntity(BlossomCoordinatorEntity):
+    """Entity bound to a charging point, each charging point is a device of its own."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator: BlossomDataUpdateCoordinator, charging_point_id: str, key: str) -> None:
+        """Initialize the entity and the device of its charging point."""
+        super().__init__(coordinator)
+        self.charging_point_id = charging_point_id
+        self._attr_unique_id = f"{charging_point_id}_{key}"
+        device, point = coordinator.device_index.charging_points[charging_point_id]
+        self._attr_device_info = DeviceInfo(
+            identifiers={charging_point_identifier(charging_point_id)},
+            manufacturer="Blossom",
+            name=point.evse_id or device.name or f"Charging point {charging_point_id}",
+            via_device=(DOMAIN, coordinator.config_entry.entry_id),
+        )
+
+    @property
+    def charging_point(self) -> ChargingPoint | None:
+        """Return the charging point of this entity, looked up by id."""
+        item = self.coordinator.device_index.charging_points.get(self.charging_point_id)
+        return item[1] if item else None
+
+    @property
+    def available(self) -> bool:
+        """Return whether the charging point is still part of the devices."""
+        return super().available and self.charging_point is not None
+
+
+def async_setup_device_entities(
+    coordinator: BlossomDataUpdateCoordinator,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    entity_factory: Callable[[str, str | None], Entity],
+) -> None:
+    """Keep an entity per charging point and per energy component in sync with the devices.
+
+    entity_factory is called with a charging point id, and a component id
+    for the entities of an energy component. Only the ids that appear or
+    disappear are added or removed, when the device index changes.
+    """
+    entities: dict[tuple[str, str | None], Entity] = {}
+    synced = [None]  # Device index the entities were last synced with
+
+    @callback
+    def _async_sync_entities() -> None:
+        index = coordinator.device_index
+        if index is synced[0]:
+            return
+        synced[0] = index
+
+        keys = {(charging_point_id, None) for charging_point_id in index.charging_points}
+        keys.update(index.components)
+        new_keys = keys - entities.keys()
+        for key in new_keys:
+            entities[key] = entity_factory(*key)
+        if new_keys:
+            async_add_entities([entities[key] for key in new_keys])
+
+        removed = entities.keys() - keys
+        if not removed:
+            return
+        entity_registry = er.async_get(coordinator.hass)
+        for key in removed:
+            entity = entities.pop(key)
+            if entity.entity_id and entity_registry.async_get(entity.entity_id):
+                # Removing the registry entry also removes the entity from Home Assistant
+                entity_registry.async_remove(entity.entity_id)
+            elif entity.hass:
+                coordinator.hass.async_create_task(entity.async_remove())
+        device_registry = dr.async_get(coordinator.hass)
+        for charging_point_id, component_id in removed:
+            if component_id is None:
+                device = device_registry.async_get_device(identifiers={charging_point_identifier(charging_point_id)})
+                if device:
+                    device_registry.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
+
+    _async_sync_entities()
+    entry.async_on_unload(coordinator.async_add_listener(_async_sync_entities))
@@ -0,0 +1,147 @@
+"""Local history of completed charging sessions."""
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, CONF_INSTALLATION_ID
+from .models import InstallationData
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Delay in seconds before the history is written to disk
+SAVE_DELAY = 60
+
+
+def _session_start(value: str | None) -> datetime | None:
+    """Parse the start time of a session."""
+    start = dt_util.parse_datetime(value) if value else None
+    if start is not None and start.tzinfo is None:
+        start = start.replace(tzinfo=dt_util.UTC)
+    return start
+
+
+class BlossomSessionHistory:
+    """Append-only store of completed charging sessions.
+
+    Each update of the coordinator is compared with the session seen before.
+    When the active session of an installation changes or disappears, the
+    previous one is appended as completed. Totals per day and per month are
+    kept in in-memory indexes, updated on every append, so queries never
+    scan the history.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        """Initialize the history."""
+        self.hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}_sessions_{entry_id}")
+        self.sessions: list[dict] = []    # Completed sessions, oldest first
+        self.active: dict[str, dict] = {}  # Session in progress per installation
+        self._daily = defaultdict(float)    # (installation id, date) -> kWh
+        self._monthly = defaultdict(float)  # (installation id, year, month) -> kWh
+        self._save_pending = False
+
+    async def async_load(self):
+        """Load the stored sessions and build the indexes."""
+        stored = await self._store.async_load() or {}
+        self.active = stored.get("active", {})
+        for session in stored.get("sessions", []):
+            self._append(session)
+
+    def _append(self, session: dict):
+        """Append a completed session and account it in the indexes."""
+        self.sessions.append(session)
+        start = _session_start(session["start"])
+        if start is None:
+            return
+        local = dt_util.as_local(start)
+        kwh = session.get("kwh") or 0
+        self._daily[(session[CONF_INSTALLATION_ID], local.date().isoformat())] += kwh
+        self._monthly[(session[CONF_INSTALLATION_ID], local.year, local.month)] += kwh
+
+    @callback
+    def async_update(self, installations: list[dict], data: dict[str, InstallationData] | None):
+        """Compare the active sessions with the previous update."""
+        if not data:
+            return
+
+        now = dt_util.utcnow().isoformat()
+        changed = False
+        for installation in installations:
+            installation_id = installation[CONF_INSTALLATION_ID]
+            if installation_id not in data:
+                continue
+            session = data[installation_id].session
+            if session is None:
+                # Session endpoint unavailable, we can't tell whether a session ended
+                continue
+            start = session.started
+
+            previous = self.active.get(installation_id)
+            if previous and previous["start"] != start:
+                # The previous session ended
+                completed = dict(previous, end=previous["last_seen"])
+                del completed["last_seen"]
+                self._append(completed)
+                del self.active[installation_id]
+                changed = True
+                _LOGGER.debug("Charging session completed: %s", completed)
+
+            if start:
+                current = {
+                    CONF_INSTALLATION_ID: installation_id,
+                    "start": start,
+                    "end": None,
+                    "kwh": session.kwh,
+                    "status": session.status,
+                }
+                # Only the last seen time moved, no need to write to disk for that
+                changed |= previous is None or any(previous.get(key) != value for key, value in current.items())
+                self.active[installation_id] = dict(current, last_seen=now)
+
+        # Write at most once per SAVE_DELAY, also while updates keep coming in
+        if changed and not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the history to persist."""
+        self._save_pending = False
+        return {"sessions": self.sessions, "active": self.active}
+
+    async def async_flush(self):
+        """Write the history to disk right away."""
+        await self._store.async_save(self._data_to_save())
+
+    def last_session(self, installation_id: str) -> dict | None:
+        """Return the last completed session of an installation."""
+        return next(
+            (session for session in reversed(self.sessions) if session[CONF_INSTALLATION_ID] == installation_id),
+            None,
+        )
+
+    def _active_kwh(self, installation_id: str, day: date | None, year: int, month: int) -> float:
+        """Return the energy of the active session if it started in the given period."""
+        session = self.active.get(installation_id)
+        start = _session_start(session["start"]) if session else None
+        if start is None:
+            return 0
+        local = dt_util.as_local(start)
+        if (local.year, local.month) != (year, month) or (day is not None and local.date() != day):
+            return 0
+        return session.get("kwh") or 0
+
+    def day_total(self, installation_id: str, day: date) -> float:
+        """Return the energy charged on a day, including the active session."""
+        return (self._daily.get((installation_id, day.isoformat()), 0)
+                + self._active_kwh(installation_id, day, day.year, day.month))
+
+    def month_total(self, installation_id: str, year: int, month: int) -> float:
+        """Return the energy charged in a month, including the active session."""
+        return (self._monthly.get((installation_id, year, month), 0)
+                + self._active_kwh(installation_id, None, year, month))
@@ -0,0 +1,81 @@
+"""Request metrics of the Blossom API, per endpoint."""
+import bisect
+import statistics
+from collections import Counter, deque
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Number of recent requests per endpoint the latency histogram is computed over
+LATENCY_WINDOW = 100
+
+
+class EndpointMetrics:
+    """Counters and recent latencies of one endpoint."""
+
+    __slots__ = ("latencies", "statuses")
+
+    def __init__(self):
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # Seconds, most recent last
+        self.statuses = Counter()  # HTTP status, "timeout" or "error" -> count
+
+    @property
+    def requests(self) -> int:
+        """Return the number of requests made."""
+        return sum(self.statuses.values())
+
+    @property
+    def errors(self) -> int:
+        """Return the number of requests that did not answer 200 or 304."""
+        return sum(count for status, count in self.statuses.items() if status not in (200, 304))
+
+    def percentile(self, percent: int) -> float | None:
+        """Return a latency percentile over the window, in seconds."""
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else None
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[percent - 1]
+
+    def histogram(self) -> dict[str, int]:
+        """Return the number of requests in the window per latency bucket."""
+        counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        for latency in self.latencies:
+            counts[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        return dict(zip(labels, counts))
+
+    def snapshot(self, bytes_received: int = 0) -> dict:
+        """Return the metrics as a json serializable dict, with the bytes counted by the client."""
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "bytes": bytes_received,
+            "latency_p50": None if p50 is None else round(p50, 3),
+            "latency_p95": None if p95 is None else round(p95, 3),
+            "latency_max": round(max(self.latencies), 3) if self.latencies else None,
+            "latency_histogram": self.histogram(),
+        }
+
+
+class BlossomMetrics:
+    """Request metrics of a config entry, kept in memory only.
+
+    The coordinator records every request here, recording is a couple of
+    counter updates so it stays cheap on every poll.
+    """
+
+    def __init__(self):
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        """Return the metrics of an endpoint, created on first use."""
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def record(self, name: str, duration: float, status):
+        """Count a request of an endpoint."""
+        metrics = self.endpoint(name)
+        metrics.latencies.append(duration)
+        metrics.statuses[status] += 1
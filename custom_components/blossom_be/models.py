@@ -0,0 +1,203 @@
+"""Compact snapshots of the Blossom API responses.
+
+Every response is parsed once into these slotted objects, which keep only
+the fields the integration uses. The raw json is dropped after parsing, so
+the large optimile devices document is not kept in memory, and entities
+read plain attributes.
+"""
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any
+
+
+class Model:
+    """Base of the snapshots, restored from their to_json() output."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Restore a snapshot persisted with to_json()."""
+        return cls(**data)
+
+
+@dataclass(frozen=True, slots=True)
+class SetPoints(Model):
+    """Charging mode and limits of an installation."""
+
+    mode: str | None
+    cap_value: int | None
+    min_charge_rate: int | None
+    current_month_peak: int | None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "SetPoints":
+        return cls(
+            mode=data.get("user_setting_mode"),
+            cap_value=data.get("user_setting_cap_value"),
+            min_charge_rate=data.get("min_charge_rate"),
+            current_month_peak=data.get("current_month_peak"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Hems(Model):
+    """Home energy management settings of an installation."""
+
+    peak_solar_capacity: int | None
+    electricity_contract: str | None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Hems":
+        return cls(
+            peak_solar_capacity=data.get("peak_solar_capacity"),
+            electricity_contract=data.get("electricity_contract"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Consumption(Model):
+    """Energy consumption of the month."""
+
+    car_consumption_wh: float | None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Consumption":
+        return cls(car_consumption_wh=data.get("carConsumptionWh"))
+
+
+@dataclass(frozen=True, slots=True)
+class ChargingSession(Model):
+    """Home charger status and its active charging session, if any."""
+
+    device_status: str | None
+    status: str | None    # Status of the session, e.g. IN_PROGRESS
+    kwh: float | None
+    started: str | None   # ISO start time of the session
+
+    @classmethod
+    def from_json(cls, data: list) -> "ChargingSession | None":
+        """Parse the first charger of the response, None when there is none."""
+        if not data:
+            return None
+        session = data[0].get("session") or {}
+        return cls(
+            device_status=data[0].get("deviceStatus"),
+            status=session.get("status"),
+            kwh=session.get("kWh"),
+            started=session.get("time_started_session"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class EnergyComponent(Model):
+    """Price component of a charging point's pricing policy."""
+
+    id: str | None
+    price: float | None
+
+
+@dataclass(frozen=True, slots=True)
+class ChargingPoint(Model):
+    """Charging point of a device."""
+
+    id: str | None
+    evse_id: str | None
+    status: str | None
+    energy_components: tuple[EnergyComponent, ...]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChargingPoint":
+        return cls(**{
+            **data,
+            "energy_components": tuple(EnergyComponent.from_dict(item) for item in data["energy_components"]),
+        })
+
+
+@dataclass(frozen=True, slots=True)
+class Device(Model):
+    """Charging device of the account."""
+
+    id: str | None
+    name: str | None
+    charging_points: tuple[ChargingPoint, ...]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Device":
+        return cls(**{
+            **data,
+            "charging_points": tuple(ChargingPoint.from_dict(item) for item in data["charging_points"]),
+        })
+
+
+def parse_devices(data: list) -> tuple[Device, ...]:
+    """Parse the optimile devices response."""
+    devices = []
+    for item in data or []:
+        device = item.get("device") or {}
+        devices.append(Device(
+            id=device.get("id"),
+            name=device.get("name"),
+            charging_points=tuple(
+                ChargingPoint(
+                    id=point.get("id"),
+                    evse_id=point.get("evse_id"),
+                    status=point.get("status"),
+                    energy_components=tuple(
+                        EnergyComponent(id=component.get("id"), price=component.get("price"))
+                        for component in (point.get("pricing_policy") or {}).get("energy_components") or []
+                    ),
+                )
+                for point in device.get("charging_points") or []
+            ),
+        ))
+    return tuple(devices)
+
+
+class DeviceIndex:
+    """Id-keyed lookups over a devices snapshot, rebuilt when the devices change."""
+
+    __slots__ = ("devices", "charging_points", "components")
+
+    def __init__(self, devices: tuple[Device, ...] | None):
+        """Index the charging points and energy components of devices by their id."""
+        self.devices = devices
+        self.charging_points: dict[str, tuple[Device, ChargingPoint]] = {}
+        self.components: dict[tuple[str, str], EnergyComponent] = {}  # (charging point id, component id)
+        for device in devices or ():
+            for point in device.charging_points:
+                if point.id is None:
+                    continue
+                self.charging_points[point.id] = (device, point)
+                for component in point.energy_components:
+                    if component.id is not None:
+                        self.components[(point.id, component.id)] = component
+
+
+@dataclass(frozen=True, slots=True)
+class InstallationData:
+    """Snapshot of everything known about one installation, coordinator.data holds one per installation."""
+
+    set_points: SetPoints | None
+    hems: Hems | None
+    consumption: Consumption | None
+    session: ChargingSession | None
+    devices: tuple[Device, ...] | None
+
+
+# Parser of the response of every endpoint, and the restore function of its snapshot
+PARSERS = {
+    "set_points": (SetPoints.from_json, SetPoints.from_dict),
+    "session": (ChargingSession.from_json, ChargingSession.from_dict),
+    "consumption": (Consumption.from_json, Consumption.from_dict),
+    "hems": (Hems.from_json, Hems.from_dict),
+    "devices": (parse_devices, lambda data: tuple(Device.from_dict(item) for item in data)),
+}
+
+
+def to_json(value: Any) -> Any:
+    """Return a snapshot (or a tuple of them) as json serializable data."""
+    if is_dataclass(value):
+        return {field.name: to_json(getattr(value, field.name)) for field in fields(value)}
+    if isinstance(value, (tuple, list)):
+        return [to_json(item) for item in value]
+    return value
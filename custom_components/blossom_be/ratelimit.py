@@ -0,0 +1,105 @@
+"""Client side rate limiting of the requests to Blossom and Auth0."""
+import asyncio
+import logging
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Longest Retry-After we honour, in seconds
+MAX_RETRY_AFTER = 3600
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the delay in seconds of a Retry-After header (seconds or an HTTP date)."""
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = (parsedate_to_datetime(value) - dt_util.utcnow()).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(delay, 0), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """Token bucket with a fair queue per owner.
+
+    Every request takes a token, tokens refill at rate per second up to
+    burst. Waiting requests are served round robin over their owners (the
+    config entries), so an entry with many installations can't starve the
+    others. pause() holds every request back, e.g. for a Retry-After.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: dict[str, deque[asyncio.Future]] = {}  # Owner -> waiting requests, in turn order
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def retry_after(self) -> float:
+        """Return the seconds left of the current pause."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, owner: str):
+        """Wait for a token, in turn with the requests of other owners."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(owner, deque()).append(waiter)
+        self._dispatch()
+        await waiter
+
+    def pause(self, delay: float):
+        """Hold back every request for delay seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._tokens = 0
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand out the available tokens, and come back when the next one is due."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and self._tokens >= 1 and now >= self._paused_until:
+            # Serve the first owner in turn, then move it to the back of the line
+            owner = next(iter(self._waiters))
+            waiters = self._waiters.pop(owner)
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiters[owner] = waiters
+            if waiter.done():
+                # Cancelled while waiting
+                continue
+            self._tokens -= 1
+            waiter.set_result(None)
+
+        if self._waiters:
+            delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+
+def async_get_rate_limiters(hass: HomeAssistant, limits: dict[str, tuple[float, int]]) -> dict[str, TokenBucket]:
+    """Return the token buckets per host, shared by every config entry."""
+    buckets = hass.data.setdefault(f"{DOMAIN}_rate_limits", {})
+    for host, (rate, burst) in limits.items():
+        if host not in buckets:
+            buckets[host] = TokenBucket(rate, burst)
+    return buckets
@@ -0,0 +1,167 @@
+"""Charging power and energy rates derived from the cumulative kWh counters."""
+import time
+from collections import deque
+from datetime import datetime
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+from .const import CONF_INSTALLATION_ID
+from .models import InstallationData
+
+# Trailing windows in seconds of the derived values
+POWER_WINDOW = 900
+ENERGY_WINDOW = 3600
+# Samples kept per counter, bounds the memory with fast polling
+MAX_SAMPLES = 256
+
+
+class RateTracker:
+    """Ring buffer of (monotonic time, running total) samples of a cumulative counter.
+
+    The counter may restart, e.g. at a new session or month: a new period
+    key, or a value below the previous one, adds the new value itself
+    instead of the difference. The running total thus only increases and
+    the rate over the window is the difference of its ends. Each update
+    and read is O(1), amortized over the evicted samples.
+
+    The monthly consumption is tracked without a key, the API may report
+    the old total shortly after the month changed.
+    """
+
+    __slots__ = ("window", "_samples", "_total", "_value", "_key")
+
+    def __init__(self, window: float, maxlen: int = MAX_SAMPLES):
+        """Initialize an empty tracker."""
+        self.window = window
+        self._samples = deque(maxlen=maxlen)
+        self._total = 0.0
+        self._value = None  # Last counter value
+        self._key = None    # Period of the last counter value
+
+    def add(self, now: float, value: float, key=None):
+        """Add a counter value read at monotonic time now, unless it is not newer than the last one."""
+        if self._samples and now <= self._samples[-1][0]:
+            return
+        if self._value is None:
+            delta = 0.0
+        elif key != self._key or value < self._value:
+            # The counter restarted from zero
+            delta = value
+        else:
+            delta = value - self._value
+        self._value, self._key = value, key
+        self._total += delta
+        self._samples.append((now, self._total))
+        self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop the samples before the window, keeping one at or before its start."""
+        samples = self._samples
+        while len(samples) >= 2 and samples[1][0] <= now - self.window:
+            samples.popleft()
+
+    def increase(self, now: float) -> float | None:
+        """Return how much the counter increased within the window, None without samples."""
+        self._evict(now)
+        if not self._samples:
+            return None
+        return self._samples[-1][1] - self._samples[0][1]
+
+    def rate(self, now: float) -> float | None:
+        """Return the average increase per hour over the window, None with too few samples.
+
+        The end of the window is now, so the rate drops when the counter
+        stops increasing, even while no new samples come in.
+        """
+        increase = self.increase(now)
+        if increase is None:
+            return None
+        elapsed = now - self._samples[0][0]
+        if elapsed <= 0 or (len(self._samples) < 2 and elapsed < self.window):
+            return None
+        return increase * 3600 / elapsed
+
+
+class BlossomChargingRates:
+    """Live charging power, energy of the last hour and the time to a target, per installation.
+
+    Fed with every coordinator update: the session kWh, keyed by the start
+    of the session, drives the power and the time to the target, the monthly
+    consumption the energy of the last hour.
+    """
+
+    def __init__(self, target_kwh: float):
+        """Initialize the trackers, target_kwh is the session energy to estimate the time to."""
+        self.target_kwh = target_kwh
+        self._power: dict[str, RateTracker] = {}
+        self._energy: dict[str, RateTracker] = {}
+        self._session_kwh: dict[str, float] = {}  # kWh of the active session
+
+    @callback
+    def async_update(self, installations: list[dict], data: dict[str, InstallationData] | None,
+                     updated: dict[tuple, datetime]):
+        """Add the counters of the coordinator data.
+
+        updated holds the time of the last successful fetch per endpoint key
+        (coordinator.endpoint_updated). Samples are taken at that time, so
+        data restored at startup counts from when it was fetched, not as if
+        everything charged during the restart was charged just now.
+        """
+        if not data:
+            return
+        now, utcnow = time.monotonic(), dt_util.utcnow()
+
+        def fetched(installation_id: str, name: str) -> float | None:
+            """Return the monotonic time an endpoint was last fetched, None when it never was."""
+            fetched_at = updated.get((installation_id, name))
+            return None if fetched_at is None else now - (utcnow - fetched_at).total_seconds()
+
+        for installation in installations:
+            installation_id = installation[CONF_INSTALLATION_ID]
+            installation_data = data.get(installation_id)
+            if installation_data is None:
+                continue
+
+            session = installation_data.session
+            if session is not None and session.started and session.kwh is not None:
+                sampled = fetched(installation_id, "session")
+                if sampled is not None:
+                    self._power.setdefault(installation_id, RateTracker(POWER_WINDOW)).add(
+                        sampled, float(session.kwh), session.started
+                    )
+                self._session_kwh[installation_id] = float(session.kwh)
+            else:
+                self._session_kwh.pop(installation_id, None)
+
+            consumption = installation_data.consumption
+            sampled = fetched(installation_id, "consumption")
+            if consumption is not None and consumption.car_consumption_wh is not None and sampled is not None:
+                self._energy.setdefault(installation_id, RateTracker(ENERGY_WINDOW)).add(
+                    sampled, float(consumption.car_consumption_wh) / 1000
+                )
+
+    def power(self, installation_id: str) -> float | None:
+        """Return the average charging power over the last minutes, in kW."""
+        if installation_id not in self._session_kwh:
+            # No active session
+            return 0.0 if installation_id in self._power else None
+        tracker = self._power.get(installation_id)
+        return tracker.rate(time.monotonic()) if tracker else None
+
+    def energy_last_hour(self, installation_id: str) -> float | None:
+        """Return the energy charged in about the last hour, in kWh."""
+        tracker = self._energy.get(installation_id)
+        return tracker.increase(time.monotonic()) if tracker else None
+
+    def time_to_target(self, installation_id: str) -> float | None:
+        """Return the estimated minutes until the active session reaches the target energy."""
+        kwh = self._session_kwh.get(installation_id)
+        if kwh is None:
+            return None
+        if kwh >= self.target_kwh:
+            return 0.0
+        power = self.power(installation_id)
+        if not power or power <= 0:
+            return None
+        return (self.target_kwh - kwh) / power * 60
@@ -1,13 +1,13 @@
 import logging
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.components.select import SelectEntity
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from .coordinator import BlossomDataUpdateCoordinator
 from .const import DOMAIN
+from .entity import BlossomEntity, async_setup_installation_entities
+from .models import SetPoints
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,21 +15,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     """Set up Blossom select entities from a config entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    # Create the dropdown entity
-    async_add_entities([BlossomModeSelect(coordinator, entry.entry_id)])
+    # Create the dropdown entity of every installation
+    async_setup_installation_entities(
+        coordinator, entry, async_add_entities,
+        lambda installation: [BlossomModeSelect(coordinator, installation)],
+    )
 
-class BlossomModeSelect(CoordinatorEntity, SelectEntity):
+class BlossomModeSelect(BlossomEntity, SelectEntity):
     """Representation of a Blossom mode selector."""
 
-    def __init__(self, coordinator: BlossomDataUpdateCoordinator, device_id : str):
-        super().__init__(coordinator)  # Bind to the coordinator
+    def __init__(self, coordinator: BlossomDataUpdateCoordinator, installation: dict):
+        super().__init__(coordinator, installation, "mode_selector")  # Bind to the coordinator
         """Initialize the select entity."""
-        self.device_id  = device_id 
-        self._attr_unique_id = f"mode_selector"
         #self._attr_current_option = self.coordinator.data.get("set_points", {}).get("user_setting_mode", "solar")
         self._attr_options = ["solar", "cap", "standard", "autopilot"]
         self._attr_translation_key = "charging_mode"
-        self._attr_has_entity_name = True
 
 
     @property
@@ -37,17 +37,19 @@ class BlossomModeSelect(CoordinatorEntity, SelectEntity):
         return EntityCategory.CONFIG
 
     @property
-    def device_info(self):
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.device_id)},
-            manufacturer="Blossom",
-        )
+    def set_points(self) -> SetPoints | None:
+        """Return the set points of this entity's installation."""
+        return self.installation_data.set_points if self.installation_data else None
         
     @property
     def current_option(self) -> str | None:
         """Return the current selected option."""
+        # Show a queued mode change until it has been sent and read back
+        pending = self.coordinator.pending_modes.get(self.installation_id)
+        if pending:
+            return pending[0]
         # Fetch the current mode from the coordinator
-        return self.coordinator.data.get("set_points", {}).get("user_setting_mode", None)
+        return self.set_points.mode if self.set_points else None
 
         
     async def async_select_option(self, option: str):
@@ -56,20 +58,11 @@ class BlossomModeSelect(CoordinatorEntity, SelectEntity):
             cap_value = None
             if option == "cap":
                 # Fetch the current value of the user_setting_cap_value sensor
-                cap_value = self.coordinator.data.get("set_points", {}).get("user_setting_cap_value")
+                cap_value = self.set_points.cap_value if self.set_points else None
                 if cap_value is None:
                     _LOGGER.error("Cannot switch to 'cap' mode: cap value is missing.")
                     return
                     
             _LOGGER.warning("Info: before update: option = %s and cap_value = %s", option, cap_value)
-            # Call the API to update the mode
-            await self.coordinator.update_mode(option, cap_value)
-            # self._attr_current_option = option
-            self.coordinator.data["set_points"]["user_setting_mode"] = option
-            self.async_write_ha_state()  # Notify Home Assistant of the change
-            
-    async def async_added_to_hass(self):
-        """Handle entity which will be added."""
-        # Ensure entity is updated when the coordinator fetches new data
-        await super().async_added_to_hass()
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+            # Queue the mode change, the coordinator notifies us once it is applied
+            await self.coordinator.async_queue_mode(self.installation_id, option, cap_value)
@@ -1,165 +1,562 @@
 import logging
-from datetime import datetime
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Any
-from .const import DOMAIN
+from .const import DOMAIN, METRICS_UPDATE_INTERVAL, RATES_UPDATE_INTERVAL
 from homeassistant.components.sensor import (
-    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
-from homeassistant.helpers.entity import Entity, DeviceInfo
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from .coordinator import BlossomDataUpdateCoordinator
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change, async_track_time_interval
+from homeassistant.util import dt as dt_util
+from .coordinator import ENDPOINTS, BlossomDataUpdateCoordinator
+from .history import BlossomSessionHistory
+from .rates import BlossomChargingRates
+from .entity import (
+    BlossomChargingPointEntity,
+    BlossomEntity,
+    async_setup_device_entities,
+    async_setup_installation_entities,
+)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
-    ATTR_BATTERY_LEVEL,
-    PERCENTAGE,
     UnitOfEnergy,
     UnitOfPower,
-    UnitOfTemperature,
-    UnitOfVolume,
     EntityCategory,
-    UnitOfElectricCurrent,
+    UnitOfInformation,
+    UnitOfTime,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
-class BlossomSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Demo sensor."""
+def compile_path(path: str) -> tuple[str | int, ...]:
+    """Parse a dotted attribute path once, numeric parts become tuple indexes."""
+    return tuple(int(key) if key.isdigit() else key for key in path.split("."))
+
+
+def get_path(data: Any, path: tuple[str | int, ...]) -> Any:
+    """Walk the installation snapshot along a compiled path, None when a step is missing."""
+    for key in path:
+        if data is None:
+            return None
+        if isinstance(key, int):
+            data = data[key] if key < len(data) else None
+        else:
+            data = getattr(data, key)
+    return data
+
+
+@dataclass(frozen=True, kw_only=True)
+class BlossomSensorEntityDescription(SensorEntityDescription):
+    """Describes a Blossom sensor."""
+
+    path: tuple[str | int, ...]
+    value_fn: Callable[[Any], Any] | None = None
+    # Value while the path can't be resolved, e.g. when there is no session
+    missing_value: Any = None
+    # Keep showing the last value while the path can't be resolved
+    keep_last: bool = False
+    # Value from the session history to show when there is no last value, e.g. after a restart
+    history_fn: Callable[[BlossomSessionHistory, str], Any] | None = None
+
+
+SENSOR_TYPES: tuple[BlossomSensorEntityDescription, ...] = (
+    BlossomSensorEntityDescription(
+        key="peak_solar_capacity",
+        path=compile_path("hems.peak_solar_capacity"),
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    BlossomSensorEntityDescription(
+        key="electricity_contract",
+        path=compile_path("hems.electricity_contract"),
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    BlossomSensorEntityDescription(
+        key="user_setting_cap_value",
+        path=compile_path("set_points.cap_value"),
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    BlossomSensorEntityDescription(
+        key="min_charge_rate",
+        path=compile_path("set_points.min_charge_rate"),
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    BlossomSensorEntityDescription(
+        key="current_month_peak",
+        path=compile_path("set_points.current_month_peak"),
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.WATT,
+    ),
+    BlossomSensorEntityDescription(
+        key="monthly_energy_consumption",
+        path=compile_path("consumption.car_consumption_wh"),
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        suggested_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=0,
+    ),
+    BlossomSensorEntityDescription(
+        key="last_session_status",
+        path=compile_path("session.status"),
+        # Sessie actief? convert status to lowerCase
+        value_fn=lambda value: value.lower(),
+        missing_value="not_active",
+    ),
+    BlossomSensorEntityDescription(
+        key="last_session_consumption",
+        path=compile_path("session.kwh"),
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=2,
+        # Geen sessie actief? behoud laatste waarde
+        missing_value=0,
+        keep_last=True,
+        history_fn=lambda history, installation_id: (history.last_session(installation_id) or {}).get("kwh"),
+    ),
+    BlossomSensorEntityDescription(
+        key="last_session_start",
+        path=compile_path("session.started"),
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=datetime.fromisoformat,
+    ),
+    BlossomSensorEntityDescription(
+        key="home_charging_status",
+        path=compile_path("session.device_status"),
+    ),
+    BlossomSensorEntityDescription(
+        key="energy_component_price",
+        path=compile_path("devices.0.charging_points.0.energy_components.0.price"),
+        device_class=SensorDeviceClass.MONETARY,
+        native_unit_of_measurement="EUR/kWh",
+    ),
+)
+
+
+class BlossomSensor(BlossomEntity, SensorEntity):
+    """Representation of a Blossom sensor."""
+
+    entity_description: BlossomSensorEntityDescription
 
     def __init__(
         self,
         coordinator: BlossomDataUpdateCoordinator,
-        unique_id: str,
-        device_id: str | None,
-        parameter: str | None,
-        device_class: SensorDeviceClass,
-        state_class: SensorStateClass | None,
-        unit_of_measurement: str | None,
-        entity_category: str | None = None,
+        installation: dict,
+        description: BlossomSensorEntityDescription,
     ) -> None:
-        super().__init__(coordinator)
-        _LOGGER.debug("Init Blosomsensor: %s, parameter: %s", unique_id, parameter)
         """Initialize the sensor."""
-        self._attr_device_class = device_class
-        self._attr_native_unit_of_measurement = unit_of_measurement
-        if unit_of_measurement == UnitOfEnergy.WATT_HOUR:
-            self._attr_suggested_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
-            self._attr_suggested_display_precision = 0
-        if unit_of_measurement == UnitOfEnergy.KILO_WATT_HOUR:
-            self._attr_suggested_display_precision = 2
-        self._attr_state_class = state_class
-        self._attr_unique_id = unique_id
-        self._attr_entity_category = entity_category
-        self._parameter= parameter
-        self._attr_translation_key = unique_id
-        self._attr_has_entity_name = True
-
-        
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, device_id)},
-            manufacturer="Blossom",
+        super().__init__(coordinator, installation, description.key)
+        _LOGGER.debug("Init Blosomsensor: %s, path: %s", description.key, description.path)
+        self.entity_description = description
+        self._attr_translation_key = description.key
+        self._attr_native_value = self._compute_value()
+
+    def _compute_value(self) -> Any:
+        """Extract and transform this sensor's value from the installation data."""
+        description = self.entity_description
+        value = get_path(self.installation_data, description.path)
+        if value is None:
+            if description.keep_last and self._attr_native_value is not None:
+                return self._attr_native_value
+            history = self.coordinator.session_history
+            if description.history_fn is not None and history is not None:
+                value = description.history_fn(history, self.installation_id)
+                if value is not None:
+                    return value
+            return description.missing_value
+        if description.value_fn is not None:
+            return description.value_fn(value)
+        return value
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Compute the value once per coordinator update, then write the state."""
+        self._attr_native_value = self._compute_value()
+        super()._handle_coordinator_update()
+
+
+class BlossomChargedEnergySensor(BlossomEntity, SensorEntity):
+    """Energy charged today or this month, from the local session history."""
+
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_suggested_display_precision = 2
+
+    def __init__(self, coordinator: BlossomDataUpdateCoordinator, installation: dict, period: str) -> None:
+        """Initialize the sensor for the "day" or "month" period."""
+        key = f"charged_this_{period}" if period == "month" else "charged_today"
+        super().__init__(coordinator, installation, key)
+        self._attr_translation_key = key
+        self._period = period
+        self._attr_native_value = self._compute_value()
+
+    def _compute_value(self) -> float | None:
+        """Look up the total of the current period in the history indexes."""
+        history = self.coordinator.session_history
+        if history is None:
+            return None
+        today = dt_util.now().date()
+        if self._period == "day":
+            return round(history.day_total(self.installation_id, today), 3)
+        return round(history.month_total(self.installation_id, today.year, today.month), 3)
+
+    async def async_added_to_hass(self) -> None:
+        """Also start over at midnight, when the data may not change."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_change(self.hass, self._async_midnight, hour=0, minute=0, second=0)
         )
-        
+
+    @callback
+    def _async_midnight(self, _now) -> None:
+        """Recompute the total for the new day or month."""
+        self._attr_native_value = self._compute_value()
+        self.async_write_ha_state_if_changed()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Compute the value once per coordinator update, then write the state."""
+        self._attr_native_value = self._compute_value()
+        super()._handle_coordinator_update()
+
+
+@dataclass(frozen=True, kw_only=True)
+class BlossomRateSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor derived from the kWh counters."""
+
+    value_fn: Callable[[BlossomChargingRates, str], float | None]
+
+
+RATE_SENSOR_TYPES: tuple[BlossomRateSensorEntityDescription, ...] = (
+    BlossomRateSensorEntityDescription(
+        key="charging_power",
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        suggested_display_precision=2,
+        value_fn=lambda rates, installation_id: rates.power(installation_id),
+    ),
+    BlossomRateSensorEntityDescription(
+        key="energy_last_hour",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=2,
+        value_fn=lambda rates, installation_id: rates.energy_last_hour(installation_id),
+    ),
+    BlossomRateSensorEntityDescription(
+        key="time_to_target",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        suggested_display_precision=0,
+        value_fn=lambda rates, installation_id: rates.time_to_target(installation_id),
+    ),
+)
+
+
+class BlossomRateSensor(BlossomEntity, SensorEntity):
+    """Charging power, energy or remaining time derived from the kWh counters.
+
+    The power drops while the counters stand still, without any change of
+    the data, so these sensors also write their state on a timer.
+    """
+
+    entity_description: BlossomRateSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: BlossomDataUpdateCoordinator,
+        installation: dict,
+        description: BlossomRateSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, installation, description.key)
+        self.entity_description = description
+        self._attr_translation_key = description.key
+        self._attr_native_value = self._compute_value()
+
+    def _compute_value(self) -> float | None:
+        """Read the derived value of the installation."""
+        rates = self.coordinator.charging_rates
+        if rates is None:
+            return None
+        value = self.entity_description.value_fn(rates, self.installation_id)
+        return None if value is None else round(value, 3)
+
+    async def async_added_to_hass(self) -> None:
+        """Also write the state on the rates timer."""
+        await super().async_added_to_hass()
+        self.async_on_remove(async_track_time_interval(
+            self.hass, self._async_tick, timedelta(seconds=RATES_UPDATE_INTERVAL)
+        ))
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        """Write the current value."""
+        self._attr_native_value = self._compute_value()
+        self.async_write_ha_state_if_changed()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Compute the value once per coordinator update, then write the state."""
+        self._attr_native_value = self._compute_value()
+        super()._handle_coordinator_update()
+
+
+class BlossomPollIntervalSensor(BlossomEntity, SensorEntity):
+    """Diagnostic sensor showing the effective (adaptive) poll interval.
+
+    Failed polls and polls without changes don't notify the listeners, yet
+    they set the backoff, so this sensor also writes its state on a timer.
+    """
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_translation_key = "poll_interval"
+
+    def __init__(self, coordinator: BlossomDataUpdateCoordinator, installation: dict) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, installation, "poll_interval")
+
     @property
-    def native_value(self) -> str | datetime | None:
-        """Return the current state."""
-        # Get the full data structure from the coordinator
-        data = self.coordinator.data
-    
-        # Split the _parameter by dots (e.g., "home-charging-session.session.status")
-        keys = self._parameter.split(".")
-
-        previous_key = None  # Initialize to track the parent key
-        # Traverse the data using the keys
-        for key in keys:
-            if isinstance(data, dict):
-                data = data.get(key)
-            elif isinstance(data, list):
-                key = int(key)  # Convert key to integer for list indexing
-                data = data[key]
-            else:
-                # If session is missing, return None or handle it
-                if previous_key == "session" and data is None:
-                    _LOGGER.debug("No session data; station status is '%s'.", 
-                                  self.coordinator.data.get("home-charging-session", {}).get("status"))
-                    if self._parameter == "home-charging-session.session.status":
-                        return "not_active"
-                    if self._parameter == "home-charging-session.session.kWh":
-                        return self._last_known_consumption if hasattr(self, "_last_known_consumption") else 0                   
-                # If the key path is invalid or not a dict, return None
-                _LOGGER.warning("Invalid key path: %s", self._parameter)
-                return None
-                
-            # Update previous_key for the next iteration
-            previous_key = key
-    
-        
-        # If this is a timestamp field, convert to datetime
-        if self._parameter == "home-charging-session.session.time_started_session":
-            return datetime.fromisoformat(data)
-    
-        # If this is the session status field, handle splitting
-        if self._parameter == "home-charging-session.status" and isinstance(data, str):
-            # Store the full value for attributes
-            self._full_status = data
-    
-            # Split the value and return only the status
-            parts = data.split("; info: ")
-            if len(parts) >= 1:
-                return parts[0].strip().lower()  # Return just the status
-
-        if self._parameter == "home-charging-session.session.status":
-            # Sessie actief? convert status to lowerCase
-            return data.lower()
-    
-        if self._parameter == "home-charging-session.session.kWh":
-            # Sessie actief? behoud laatste waarde
-            self._last_known_consumption = data  # Bewaar de huidige waarde
-    
-        # Default return: raw data
-        return data
-        
+    def available(self) -> bool:
+        """Stay available while backing off after failed updates."""
+        return True
+
     @property
-    def extra_state_attributes(self) -> dict[str, Any] | None:
-        """Return extra state attributes."""
-        attributes = {}
-    
-        # Split and add status and info if _full_status is existing
-        if hasattr(self, "_full_status") and isinstance(self._full_status, str):
-            parts = self._full_status.split("; info: ")
-            if len(parts) > 1:
-                attributes["status"] = parts[0].strip()
-                attributes["info"] = parts[1].strip()
-                
-        return attributes
-      
-        
+    def native_value(self) -> int:
+        """Return the delay until the next update, in seconds."""
+        return round(self.coordinator.update_interval.total_seconds())
+
+    async def async_added_to_hass(self) -> None:
+        """Also write the state on the metrics timer."""
+        await super().async_added_to_hass()
+        self.async_on_remove(async_track_time_interval(
+            self.hass, self._async_tick, timedelta(seconds=METRICS_UPDATE_INTERVAL)
+        ))
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        """Write the current interval."""
+        self.async_write_ha_state_if_changed()
+
+
+class BlossomChargingPointStatusSensor(BlossomChargingPointEntity, SensorEntity):
+    """Status of a charging point."""
+
+    _attr_translation_key = "charging_point_status"
+
+    def __init__(self, coordinator: BlossomDataUpdateCoordinator, charging_point_id: str) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, charging_point_id, "status")
+
+    @property
+    def native_value(self) -> str | None:
+        """Return the status of the charging point."""
+        point = self.charging_point
+        return point.status if point else None
+
+
+class BlossomEnergyComponentPriceSensor(BlossomChargingPointEntity, SensorEntity):
+    """Price of one energy component of a charging point's pricing policy."""
+
+    _attr_translation_key = "charging_point_price"
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_native_unit_of_measurement = "EUR/kWh"
+
+    def __init__(self, coordinator: BlossomDataUpdateCoordinator, charging_point_id: str, component_id: str) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, charging_point_id, f"{component_id}_price")
+        self.component_id = component_id
+        # Name the component after its position when it was first seen, the value is looked up by id
+        _, point = coordinator.device_index.charging_points[charging_point_id]
+        position = next(
+            (number for number, component in enumerate(point.energy_components, 1) if component.id == component_id),
+            component_id,
+        )
+        self._attr_translation_placeholders = {"component": str(position)}
+
+    @property
+    def available(self) -> bool:
+        """Return whether the component is still part of the pricing policy."""
+        return super().available and (self.charging_point_id, self.component_id) in self.coordinator.device_index.components
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the price of the component."""
+        component = self.coordinator.device_index.components.get((self.charging_point_id, self.component_id))
+        return component.price if component else None
+
+
+@dataclass(frozen=True, kw_only=True)
+class BlossomMetricSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor showing a request metric of the coordinator."""
+
+    # Metrics name of the endpoint, None for the metrics that are not per endpoint
+    endpoint: str | None = None
+    # Extract the value from the metrics snapshot of the endpoint (or the whole snapshot)
+    value_fn: Callable[[dict], Any]
+    attributes_fn: Callable[[dict], dict] | None = None
+
+
+def _metric_descriptions() -> list[BlossomMetricSensorEntityDescription]:
+    """Return the metric sensor descriptions of every endpoint and the token."""
+    descriptions = []
+    for endpoint in ("/current", *ENDPOINTS):
+        label = endpoint.strip("/")
+        descriptions += [
+            BlossomMetricSensorEntityDescription(
+                key=f"{label}_latency",
+                translation_key="endpoint_latency",
+                endpoint=endpoint,
+                device_class=SensorDeviceClass.DURATION,
+                state_class=SensorStateClass.MEASUREMENT,
+                native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+                value_fn=lambda metrics: None if metrics.get("latency_p50") is None else round(1000 * metrics["latency_p50"]),
+                attributes_fn=lambda metrics: {
+                    key: metrics.get(key) for key in ("latency_p95", "latency_max", "latency_histogram")
+                },
+            ),
+            BlossomMetricSensorEntityDescription(
+                key=f"{label}_errors",
+                translation_key="endpoint_errors",
+                endpoint=endpoint,
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                value_fn=lambda metrics: metrics.get("errors", 0),
+                attributes_fn=lambda metrics: {
+                    "requests": metrics.get("requests", 0),
+                    "statuses": metrics.get("statuses", {}),
+                },
+            ),
+            BlossomMetricSensorEntityDescription(
+                key=f"{label}_bytes",
+                translation_key="endpoint_bytes",
+                endpoint=endpoint,
+                device_class=SensorDeviceClass.DATA_SIZE,
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                native_unit_of_measurement=UnitOfInformation.BYTES,
+                value_fn=lambda metrics: metrics.get("bytes", 0),
+            ),
+        ]
+    descriptions.append(BlossomMetricSensorEntityDescription(
+        key="state_writes",
+        translation_key="state_writes",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda snapshot: snapshot["state_writes"]["performed"],
+        attributes_fn=lambda snapshot: {"skipped": snapshot["state_writes"]["skipped"]},
+    ))
+    descriptions.append(BlossomMetricSensorEntityDescription(
+        key="token_refreshes",
+        translation_key="token_refreshes",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda snapshot: snapshot["token_refreshes"],
+        attributes_fn=lambda snapshot: {"failures": snapshot["token_refresh_failures"]},
+    ))
+    return descriptions
+
+
+METRIC_SENSOR_TYPES = _metric_descriptions()
+
+
+class BlossomMetricSensor(BlossomEntity, SensorEntity):
+    """Diagnostic sensor showing a request metric, disabled by default.
+
+    The metrics change on every request, also when the data does not, so
+    these sensors write their state on a timer of their own.
+    """
+
+    entity_description: BlossomMetricSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: BlossomDataUpdateCoordinator,
+        installation: dict,
+        description: BlossomMetricSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, installation, description.key)
+        self.entity_description = description
+        self._attr_translation_key = description.translation_key
+        if description.endpoint:
+            self._attr_translation_placeholders = {"endpoint": description.endpoint.strip("/")}
+        self._update_value()
+
+    @property
+    def available(self) -> bool:
+        """Stay available while updates fail, that is when the metrics matter most."""
+        return True
+
+    def _update_value(self) -> None:
+        """Read the value and attributes from the metrics snapshot."""
+        description = self.entity_description
+        snapshot = self.coordinator.metrics_snapshot()
+        if description.endpoint:
+            snapshot = snapshot["endpoints"].get(description.endpoint, {})
+        self._attr_native_value = description.value_fn(snapshot)
+        if description.attributes_fn is not None:
+            self._attr_extra_state_attributes = description.attributes_fn(snapshot)
+
+    async def async_added_to_hass(self) -> None:
+        """Also write the state on the metrics timer."""
+        await super().async_added_to_hass()
+        self.async_on_remove(async_track_time_interval(
+            self.hass, self._async_tick, timedelta(seconds=METRICS_UPDATE_INTERVAL)
+        ))
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        """Write the current metrics."""
+        self._update_value()
+        self.async_write_ha_state_if_changed()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Read the metrics once per coordinator update, then write the state."""
+        self._update_value()
+        super()._handle_coordinator_update()
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):   
     _LOGGER.debug("Setup_entry sensor platform.")
     # Access the coordinator stored in hass.data
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    
-    # Create sensors entities
-    device_id = entry.entry_id
-    entities = [
-        BlossomSensor(coordinator, "peak_solar_capacity", device_id,    "hems.peak_solar_capacity",     SensorDeviceClass.POWER, None, UnitOfPower.WATT, EntityCategory.DIAGNOSTIC ),
-        BlossomSensor(coordinator, "electricity_contract", device_id,   "hems.electricity_contract",    None, None, None, EntityCategory.DIAGNOSTIC ),
-        BlossomSensor(coordinator, "user_setting_cap_value", device_id, "set_points.user_setting_cap_value",  SensorDeviceClass.POWER, None, UnitOfPower.WATT, EntityCategory.DIAGNOSTIC ),
-        BlossomSensor(coordinator, "min_charge_rate", device_id,        "set_points.min_charge_rate",         SensorDeviceClass.POWER, None, UnitOfPower.WATT, EntityCategory.DIAGNOSTIC ),
-        BlossomSensor(coordinator, "current_month_peak", device_id,     "set_points.current_month_peak",      SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT, UnitOfPower.WATT, None ),   
-        BlossomSensor(coordinator, "monthly_energy_consumption", device_id, "consumption.carConsumptionWh",    SensorDeviceClass.ENERGY, SensorStateClass.TOTAL_INCREASING, UnitOfEnergy.WATT_HOUR, None ),   
-        BlossomSensor(coordinator, "last_session_status", device_id,         "home-charging-session.session.status",    None, None, None, None ),   
-        BlossomSensor(coordinator, "last_session_consumption", device_id,    "home-charging-session.session.kWh",    SensorDeviceClass.ENERGY, SensorStateClass.TOTAL_INCREASING, UnitOfEnergy.KILO_WATT_HOUR, None ),   
-        BlossomSensor(coordinator, "last_session_start", device_id,          "home-charging-session.session.time_started_session",    SensorDeviceClass.TIMESTAMP, None, None, None ),
-        BlossomSensor(coordinator, "home_charging_status", device_id,   "home-charging-session.deviceStatus",    None, None, None, None ),
-        
-        BlossomSensor(coordinator, "energy_component_price", device_id,  "devices.0.device.charging_points.0.pricing_policy.energy_components.0.price",    SensorDeviceClass.MONETARY, None, "EUR/kWh", None ),   
-    ]
-    
-    for ent in entities:
-        _LOGGER.debug("Sensor entity: %s (translationkey: %s, has_entity_name: %s)", ent._attr_unique_id, ent._attr_translation_key, ent._attr_has_entity_name)
-        
-    async_add_entities(entities)
+
+    def _create_entities(installation: dict) -> list[SensorEntity]:
+        """Create the sensor entities of one installation."""
+        entities = [BlossomSensor(coordinator, installation, description) for description in SENSOR_TYPES]
+        entities.extend(BlossomChargedEnergySensor(coordinator, installation, period) for period in ("day", "month"))
+        entities.extend(BlossomRateSensor(coordinator, installation, description) for description in RATE_SENSOR_TYPES)
+        if installation is coordinator.installations[0]:
+            # The poll interval and metrics are shared by all installations, show them once
+            entities.append(BlossomPollIntervalSensor(coordinator, installation))
+            entities.extend(BlossomMetricSensor(coordinator, installation, description) for description in METRIC_SENSOR_TYPES)
+
+        for ent in entities:
+            _LOGGER.debug("Sensor entity: %s (translationkey: %s, has_entity_name: %s)", ent._attr_unique_id, ent._attr_translation_key, ent._attr_has_entity_name)
+        return entities
+
+    async_setup_installation_entities(coordinator, entry, async_add_entities, _create_entities)
+
+    def _create_device_entity(charging_point_id: str, component_id: str | None) -> SensorEntity:
+        """Create the sensor of a charging point, or of one of its energy components."""
+        if component_id is None:
+            return BlossomChargingPointStatusSensor(coordinator, charging_point_id)
+        return BlossomEnergyComponentPriceSensor(coordinator, charging_point_id, component_id)
+
+    # One device per charging point, following the devices payload by id
+    async_setup_device_entities(coordinator, entry, async_add_entities, _create_device_entity)
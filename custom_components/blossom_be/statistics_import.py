@@ -0,0 +1,182 @@
+"""Import charging energy into Home Assistant's long-term statistics."""
+import logging
+from datetime import datetime, timedelta
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_utc_time_change
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, CONF_INSTALLATION_ID
+from .coordinator import BlossomDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Delay in seconds before watermarks are written to disk
+SAVE_DELAY = 30
+
+# Cumulative counters turned into hourly statistics: name -> (statistic name,
+# function returning the counter in kWh and the key of the period it counts
+# from installation data). A new key means the counter restarted.
+COUNTERS = {
+    "car_consumption": (
+        "car consumption",
+        lambda data: (_kwh(data.consumption.car_consumption_wh if data.consumption else None, 1000), None),
+    ),
+    "session_energy": (
+        "charging session energy",
+        lambda data: (
+            _kwh(data.session.kwh if data.session else None, 1),
+            data.session.started if data.session else None,
+        ),
+    ),
+}
+
+
+def _kwh(value, divider: float) -> float | None:
+    """Convert a raw counter to kWh, None when it is missing."""
+    if value is None:
+        return None
+    try:
+        return float(value) / divider
+    except (TypeError, ValueError):
+        return None
+
+
+def statistic_id(installation_id: str, counter: str) -> str:
+    """Return the external statistic id of a counter."""
+    return f"{DOMAIN}:{counter}_{installation_id}".lower().replace("-", "_")
+
+
+class HourlyCounter:
+    """Turn samples of a resetting cumulative counter into hourly statistic rows.
+
+    The counter resets at the start of a month (consumption) or of a session
+    (session kWh); a new period key, or a lower value than the previous one,
+    is treated as a reset and counted from zero. Energy seen in a sample is
+    accounted to the hour of that sample. Hours that passed without samples,
+    e.g. while Home Assistant was down, are backfilled with an unchanged sum.
+    """
+
+    def __init__(self, stored: dict | None = None):
+        """Restore the watermark of the last imported hour."""
+        stored = stored or {}
+        self.value = stored.get("value")      # Last counter value
+        self.key = stored.get("key")          # Period the last value belongs to
+        self.sum = stored.get("sum", 0.0)     # Total energy since we started counting
+        watermark = stored.get("watermark")   # Start of the last imported hour
+        self.watermark = dt_util.parse_datetime(watermark) if watermark else None
+
+    def as_dict(self) -> dict:
+        """Return the state to persist."""
+        return {
+            "value": self.value,
+            "key": self.key,
+            "sum": self.sum,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+
+    def add(self, value: float | None, key, now: datetime) -> list[StatisticData]:
+        """Add a sample, return the rows of the hours completed before it."""
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        rows = []
+        if self.watermark is None:
+            self.watermark = hour - timedelta(hours=1)
+        else:
+            # Close every hour up to the current one with the sum before this sample
+            start = self.watermark + timedelta(hours=1)
+            while start < hour:
+                row = StatisticData(start=start, sum=self.sum)
+                if self.value is not None:
+                    row["state"] = self.value
+                rows.append(row)
+                start += timedelta(hours=1)
+            if rows:
+                self.watermark = rows[-1]["start"]
+
+        if value is not None:
+            if self.value is not None:
+                restarted = key != self.key or value < self.value
+                self.sum += value if restarted else value - self.value
+            self.value = value
+            self.key = key
+        return rows
+
+
+class BlossomStatisticsImporter:
+    """Feed the coordinator data into hourly external statistics."""
+
+    def __init__(self, hass: HomeAssistant, coordinator: BlossomDataUpdateCoordinator):
+        """Initialize the importer."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}_statistics_{coordinator.config_entry.entry_id}")
+        self._counters: dict[str, HourlyCounter] = {}
+        self._save_pending = False
+
+    async def async_setup(self):
+        """Restore the watermarks and start following the coordinator."""
+        stored = await self._store.async_load() or {}
+        self._counters = {key: HourlyCounter(value) for key, value in stored.items()}
+
+        entry = self.coordinator.config_entry
+        entry.async_on_unload(self.coordinator.async_add_listener(self._async_sample))
+        # Also close hours while the data doesn't change
+        entry.async_on_unload(async_track_utc_time_change(self.hass, self._async_sample, minute=0, second=30))
+        entry.async_on_unload(self._async_flush)
+        self._async_sample()
+
+    @callback
+    def _async_sample(self, _now: datetime | None = None):
+        """Sample every counter, import the hours completed since the last sample."""
+        if not self.coordinator.last_update_success or not self.coordinator.data:
+            return
+
+        now = dt_util.utcnow()
+        for installation in self.coordinator.installations:
+            installation_id = installation[CONF_INSTALLATION_ID]
+            data = self.coordinator.data.get(installation_id)
+            if data is None:
+                continue
+            for counter, (name, value_fn) in COUNTERS.items():
+                stat_id = statistic_id(installation_id, counter)
+                hourly = self._counters.setdefault(stat_id, HourlyCounter())
+                rows = hourly.add(*value_fn(data), now)
+                if rows:
+                    self._async_import(stat_id, name, installation, rows)
+
+        # Write at most once per SAVE_DELAY, also while updates keep coming in
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _async_import(self, stat_id: str, name: str, installation: dict, rows: list[StatisticData]):
+        """Hand a batch of hourly rows to the recorder."""
+        if len(self.coordinator.installations) > 1:
+            name = f"{name} {installation.get('name') or installation[CONF_INSTALLATION_ID]}"
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"Blossom {name}",
+            source=DOMAIN,
+            statistic_id=stat_id,
+            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        )
+        _LOGGER.debug("Importing %s hourly statistics for %s.", len(rows), stat_id)
+        async_add_external_statistics(self.hass, metadata, rows)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the watermarks to persist."""
+        self._save_pending = False
+        return {key: counter.as_dict() for key, counter in self._counters.items()}
+
+    @callback
+    def _async_flush(self):
+        """Write the watermarks right away when the entry unloads."""
+        self.hass.async_create_task(self._store.async_save(self._data_to_save()))
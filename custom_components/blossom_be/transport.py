@@ -0,0 +1,228 @@
+"""Record and replay of the Blossom API traffic of a config entry.
+
+A recording client stores every response it receives, with its timing, in
+a cassette: a list of entries kept in .storage/blossom_be_cassette_<entry id>.
+Tokens and personal data are redacted, member and installation ids are
+replaced by stable aliases so the recorded requests still match up.
+
+A replay client answers from such a cassette instead of the network, so
+the full update path of the coordinator can be run and profiled offline.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict, deque
+
+import aiohttp
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+
+from .api import AUTH_URL, CURRENT_URL, BlossomApiClient, BlossomApiError, BlossomAuthError, parse_installations
+from .const import CONF_INSTALLATION_ID, CONF_MEMBER_ID
+from .diagnostics import TO_REDACT
+
+_LOGGER = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+# Recording stops once a cassette holds this many responses
+MAX_CASSETTE_ENTRIES = 2000
+# Delay in seconds before the cassette is written to disk
+SAVE_DELAY = 30
+
+REDACTED = "**REDACTED**"
+# Ids are aliased instead of redacted, they link the requests to the responses
+ID_KEYS = {CONF_MEMBER_ID, CONF_INSTALLATION_ID, "memberId", "installationId"}
+REDACT_KEYS = (TO_REDACT - ID_KEYS) | {"refresh_token", "id_token"}
+
+
+def _request_key(method: str, url: str, params: dict | None) -> tuple:
+    """Return the key a recorded response is looked up by."""
+    return method, url, tuple(sorted((params or {}).items()))
+
+
+def _digest(data) -> bytes:
+    """Return the body digest of a replayed payload, like the API client does for a real body."""
+    return hashlib.blake2b(json.dumps(data, sort_keys=True).encode(), digest_size=16).digest()
+
+
+class BlossomRecordingClient(BlossomApiClient):
+    """API client that records every response to a cassette."""
+
+    def __init__(self, session: aiohttp.ClientSession, store: Store, rate_limits: dict | None = None, owner: str = ""):
+        """Initialize the client, recording into store."""
+        super().__init__(session, rate_limits, owner)
+        self._store = store
+        self.entries: list[dict] = []
+        self._aliases: dict[str, str] = {}  # Real id -> alias
+        self._started = time.monotonic()
+        self._save_pending = False
+
+    def _alias(self, value: str, kind: str) -> str:
+        """Return the stable alias of an id."""
+        alias = self._aliases.get(value)
+        if alias is None:
+            alias = self._aliases[value] = f"{kind}-{len(self._aliases) + 1}"
+        return alias
+
+    def _learn_ids(self, url: str, params: dict | None, data):
+        """Pick up the member and installation ids seen in a request or response."""
+        for key, value in (params or {}).items():
+            if key in ID_KEYS and value:
+                self._alias(str(value), "member" if "member" in key.lower() else "installation")
+        if url == CURRENT_URL and isinstance(data, dict):
+            for installation in parse_installations(data):
+                self._alias(installation[CONF_MEMBER_ID], "member")
+                self._alias(installation[CONF_INSTALLATION_ID], "installation")
+
+    def _scrub(self, data):
+        """Return data with secrets redacted and ids replaced by their alias."""
+        if isinstance(data, dict):
+            return {key: REDACTED if key in REDACT_KEYS else self._scrub(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [self._scrub(value) for value in data]
+        if isinstance(data, str):
+            return self._aliases.get(data, data)
+        return data
+
+    def _record(self, method: str, url: str, params: dict | None, started: float, **response):
+        """Append a redacted response to the cassette."""
+        if len(self.entries) >= MAX_CASSETTE_ENTRIES:
+            if len(self.entries) == MAX_CASSETTE_ENTRIES:
+                _LOGGER.warning("Cassette is full after %s responses, recording stopped.", MAX_CASSETTE_ENTRIES)
+                self.entries.append(None)  # Only warn once, dropped when saving
+            return
+        self._learn_ids(url, params, response.get("data"))
+        self.entries.append({
+            "method": method,
+            "url": url,
+            "params": self._scrub(params),
+            "offset": round(started - self._started, 3),
+            "duration": round(time.monotonic() - started, 3),
+            **self._scrub(response),
+        })
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the cassette to persist."""
+        self._save_pending = False
+        return {"entries": [entry for entry in self.entries if entry is not None]}
+
+    async def async_request_token(self, refresh_token: str) -> dict:
+        started = time.monotonic()
+        try:
+            data = await super().async_request_token(refresh_token)
+        except BlossomAuthError as err:
+            self._record("POST", AUTH_URL, None, started, status=err.status, data=err.data)
+            raise
+        except BlossomApiError as err:
+            self._record("POST", AUTH_URL, None, started, error=str(err))
+            raise
+        self._record("POST", AUTH_URL, None, started, status=200, data=data)
+        return data
+
+    async def async_get(self, url: str, access_token: str, params: dict | None = None, validators: tuple | None = None,
+                        timeout: float | None = None):
+        started = time.monotonic()
+        try:
+            status, data, new_validators = await super().async_get(url, access_token, params, validators, timeout)
+        except Exception as err:
+            self._record("GET", url, params, started, error=repr(err))
+            raise
+        etag, last_modified, _ = new_validators or (None, None, None)
+        self._record("GET", url, params, started, status=status, data=data, etag=etag, last_modified=last_modified)
+        return status, data, new_validators
+
+    async def async_post(self, url: str, access_token: str, json_data: dict, params: dict | None = None,
+                         timeout: float | None = None) -> int:
+        started = time.monotonic()
+        try:
+            status = await super().async_post(url, access_token, json_data, params, timeout)
+        except Exception as err:
+            self._record("POST", url, params, started, json=json_data, error=repr(err))
+            raise
+        self._record("POST", url, params, started, json=json_data, status=status)
+        return status
+
+    async def async_close(self):
+        """Write the cassette and stop accepting requests."""
+        await self._store.async_save(self._data_to_save())
+        await super().async_close()
+
+
+class BlossomReplayClient(BlossomApiClient):
+    """API client answering from a recorded cassette.
+
+    Responses to the same request are replayed in the recorded order, the
+    last one is repeated once they run out, so polling may go on for as
+    long as needed. A request that was never recorded with these params
+    gets the responses recorded for the same url with other params.
+
+    speed 0 answers as fast as possible, speed 1 takes the recorded response
+    times, 2 half of them and so on.
+    """
+
+    def __init__(self, entries: list[dict], speed: float = 0):
+        """Initialize the client from the entries of a cassette."""
+        super().__init__(None)
+        self.speed = speed
+        self._responses: dict[tuple, deque] = defaultdict(deque)
+        for entry in entries:
+            self._responses[_request_key(entry["method"], entry["url"], entry.get("params"))].append(entry)
+        self._last: dict[tuple, dict] = {}
+
+    @classmethod
+    def from_file(cls, path: str, speed: float = 0) -> "BlossomReplayClient":
+        """Load a cassette file, as written to .storage by the recording client."""
+        with open(path, encoding="utf-8") as file:
+            cassette = json.load(file)
+        # Files written by a Store wrap the cassette in a data key
+        return cls(cassette.get("data", cassette)["entries"], speed)
+
+    async def _async_replay(self, method: str, url: str, params: dict | None) -> dict:
+        """Return the next recorded response of a request, after its recorded duration."""
+        if self._closed:
+            raise BlossomApiError("Client is closed")
+        key = _request_key(method, url, params)
+        if key not in self._responses and key not in self._last:
+            key = next((other for other in self._responses if other[:2] == key[:2]), key)
+        queue = self._responses.get(key)
+        entry = queue.popleft() if queue else self._last.get(key)
+        if entry is None:
+            raise BlossomApiError(f"No recorded response for {method} {url}")
+        self._last[key] = entry
+
+        if self.speed:
+            await asyncio.sleep(entry["duration"] / self.speed)
+        if entry.get("error"):
+            raise BlossomApiError(entry["error"])
+        return entry
+
+    async def async_request_token(self, refresh_token: str) -> dict:
+        entry = await self._async_replay("POST", AUTH_URL, None)
+        if entry["status"] != 200:
+            raise BlossomAuthError(entry["status"], entry["data"])
+        return entry["data"]
+
+    async def async_get(self, url: str, access_token: str, params: dict | None = None, validators: tuple | None = None,
+                        timeout: float | None = None):
+        entry = await self._async_replay("GET", url, params)
+        status, data, etag = entry["status"], entry["data"], entry.get("etag")
+        if status == 304 or (validators and etag and validators[0] == etag):
+            return 304, None, validators
+        if status != 200:
+            return status, None, None
+        self.bytes_received[url] += len(json.dumps(data))
+        last_modified = entry.get("last_modified")
+        digest = None if etag or last_modified else _digest(data)
+        if digest is not None and validators and validators[2] == digest:
+            return 304, None, validators
+        return status, data, (etag, last_modified, digest)
+
+    async def async_post(self, url: str, access_token: str, json_data: dict, params: dict | None = None,
+                         timeout: float | None = None) -> int:
+        return (await self._async_replay("POST", url, params))["status"]
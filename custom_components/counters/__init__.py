@@ -0,0 +1,124 @@
+"""Counters incremented through a service, replacing python_scripts/counter.py.
+
+Set up in configuration.yaml, the window is optional:
+
+    counters:
+      window: 1
+
+and increment with the counters.increment service:
+
+    service: counters.increment
+    data:
+      entity_id: sensor.my_counter
+"""
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
+
+from .const import DOMAIN, CONF_WINDOW, DEFAULT_WINDOW, SAVE_DELAY, SERVICE_INCREMENT, ATTR_AMOUNT
+
+_LOGGER = logging.getLogger(__name__)
+
+CONFIG_SCHEMA = vol.Schema(
+    {
+        # A bare "counters:" is None in the configuration
+        DOMAIN: vol.Any(None, vol.Schema({
+            vol.Optional(CONF_WINDOW, default=DEFAULT_WINDOW): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        })),
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+INCREMENT_SCHEMA = vol.Schema({
+    vol.Required("entity_id"): cv.entities_domain("sensor"),
+    vol.Optional(ATTR_AMOUNT, default=1): vol.All(vol.Coerce(int), vol.Range(min=1)),
+})
+
+
+class BatchedCounters:
+    """Counter values, written to the state machine at most once per window.
+
+    Increments are applied to the values in memory right away, in the event
+    loop, so concurrent calls can't lose any. The states of the changed
+    counters are written together when the window has passed, and the values
+    are stored to be restored after a restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, window: float):
+        """Initialize without any counters."""
+        self.hass = hass
+        self.window = window
+        self.values: dict[str, int] = {}
+        self._changed: set[str] = set()  # Counters with an unwritten value
+        self._unsub_flush = None
+        self._store = Store(hass, 1, DOMAIN)
+        self._save_pending = False
+
+    async def async_load(self):
+        """Restore the stored values and write their states."""
+        self.values = await self._store.async_load() or {}
+        self._changed.update(self.values)
+        self._async_flush()
+
+    def _initial_value(self, entity_id: str) -> int:
+        """Start a new counter at its current state, e.g. one set by the python script."""
+        state = self.hass.states.get(entity_id)
+        try:
+            return int(state.state) if state else 0
+        except ValueError:
+            return 0
+
+    @callback
+    def async_increment(self, entity_ids: list[str], amount: int = 1):
+        """Add amount to every counter, the states are written when the window has passed."""
+        for entity_id in entity_ids:
+            if entity_id not in self.values:
+                self.values[entity_id] = self._initial_value(entity_id)
+            self.values[entity_id] += amount
+            self._changed.add(entity_id)
+        # Write at most once per SAVE_DELAY, also while increments keep coming in
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+        if not self.window:
+            self._async_flush()
+        elif self._unsub_flush is None:
+            self._unsub_flush = async_call_later(self.hass, self.window, self._async_flush)
+
+    @callback
+    def _data_to_save(self) -> dict[str, int]:
+        """Return the values to persist."""
+        self._save_pending = False
+        return self.values
+
+    @callback
+    def _async_flush(self, _now=None):
+        """Write the states of the changed counters."""
+        self._unsub_flush = None
+        for entity_id in self._changed:
+            self.hass.states.async_set(entity_id, self.values[entity_id])
+        self._changed.clear()
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the counters and their increment service."""
+    if DOMAIN not in config:
+        return True
+    window = (config[DOMAIN] or {}).get(CONF_WINDOW, DEFAULT_WINDOW)
+    counters = hass.data[DOMAIN] = BatchedCounters(hass, window)
+    await counters.async_load()
+
+    @callback
+    def async_handle_increment(call: ServiceCall) -> None:
+        """Increment the counters of the call."""
+        counters.async_increment(call.data["entity_id"], call.data[ATTR_AMOUNT])
+
+    hass.services.async_register(DOMAIN, SERVICE_INCREMENT, async_handle_increment, schema=INCREMENT_SCHEMA)
+    return True
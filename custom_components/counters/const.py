@@ -0,0 +1,12 @@
+"""Constants for the Counters integration."""
+DOMAIN = "counters"
+
+# Seconds to collect increments before the counter states are written
+CONF_WINDOW = "window"
+DEFAULT_WINDOW = 1
+
+# Delay in seconds before the counter values are written to disk
+SAVE_DELAY = 10
+
+SERVICE_INCREMENT = "increment"
+ATTR_AMOUNT = "amount"
@@ -0,0 +1,7 @@
+"""Count of the people at home, from the device trackers.
+
+Replaces python_scripts/count_people_home.py, set up in configuration.yaml:
+
+    sensor:
+      - platform: people_home
+"""
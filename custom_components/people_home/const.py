@@ -0,0 +1,4 @@
+"""Constants for the People home integration."""
+DOMAIN = "people_home"
+
+ATTR_PEOPLE = "people"
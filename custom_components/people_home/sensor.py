@@ -0,0 +1,72 @@
+"""Sensor counting the device trackers that are home."""
+import logging
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import STATE_HOME
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant, State, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import TrackStates, async_track_state_change_filtered
+
+from .const import ATTR_PEOPLE, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACKER_DOMAIN = "device_tracker"
+
+
+async def async_setup_platform(hass: HomeAssistant, config, async_add_entities: AddEntitiesCallback, discovery_info=None):
+    """Set up the people home sensor from configuration.yaml."""
+    async_add_entities([PeopleHomeSensor()])
+
+
+class PeopleHomeSensor(SensorEntity):
+    """Number of device trackers that are home, kept up to date from their state changes.
+
+    The trackers are scanned once when the sensor is added. After that every
+    state change of a tracker only adds it to, or removes it from, the set of
+    trackers at home, and the state is written when the count changed.
+    """
+
+    _attr_name = "People home"
+    _attr_unique_id = DOMAIN
+    _attr_icon = "mdi:home-account"
+    _attr_native_unit_of_measurement = "people"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_should_poll = False
+
+    def __init__(self) -> None:
+        """Initialize the sensor without anyone home."""
+        self._home: dict[str, str] = {}  # Tracker entity id -> name, of the trackers at home
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of trackers at home."""
+        return len(self._home)
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the names of the trackers at home."""
+        return {ATTR_PEOPLE: sorted(self._home.values())}
+
+    async def async_added_to_hass(self) -> None:
+        """Scan the trackers once, then follow their state changes."""
+        for state in self.hass.states.async_all(TRACKER_DOMAIN):
+            self._update_tracker(state.entity_id, state)
+        self.async_on_remove(async_track_state_change_filtered(
+            self.hass, TrackStates(False, set(), {TRACKER_DOMAIN}), self._async_tracker_changed
+        ).async_remove)
+
+    def _update_tracker(self, entity_id: str, state: State | None) -> bool:
+        """Update whether a tracker is home, return whether the count changed."""
+        if state is not None and state.state == STATE_HOME:
+            was_home = entity_id in self._home
+            self._home[entity_id] = state.name
+            return not was_home
+        return self._home.pop(entity_id, None) is not None
+
+    @callback
+    def _async_tracker_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Write the state when a tracker arrived home or left."""
+        if self._update_tracker(event.data["entity_id"], event.data["new_state"]):
+            _LOGGER.debug("%s people home", len(self._home))
+            self.async_write_ha_state()
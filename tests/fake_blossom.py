@@ -0,0 +1,168 @@
+"""Local stand-in for the Blossom API and its Auth0 token endpoint."""
+import asyncio
+import random
+from collections import Counter
+from urllib.parse import urlsplit
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+
+from custom_components.blossom_be import api
+
+# Hosts of the real API that are served by the fake server
+REAL_HOSTS = {urlsplit(url).netloc for url in (api.AUTH_URL, api.CURRENT_URL)}
+
+
+def devices_payload(count: int) -> list:
+    """Return an optimile devices payload with count devices of two charging points each."""
+    return [
+        {
+            "device": {
+                "id": f"device-{device}",
+                "name": f"Charger {device}",
+                "charging_points": [
+                    {
+                        "id": f"cp-{device}-{point}",
+                        "evse_id": f"BE*BLO*E{device:05d}{point}",
+                        "status": "Available",
+                        "pricing_policy": {
+                            "id": f"policy-{device}-{point}",
+                            "energy_components": [
+                                {"id": f"ec-{device}-{point}-{component}", "price": 0.25 + component / 100}
+                                for component in range(3)
+                            ],
+                        },
+                    }
+                    for point in range(2)
+                ],
+            }
+        }
+        for device in range(count)
+    ]
+
+
+class FakeBlossomApi:
+    """aiohttp application answering every endpoint the coordinator uses.
+
+    latency is added to every response (seconds), error_rate is the chance
+    a Blossom endpoint answers 500 instead and auth_error_rate the same for
+    the token endpoint. devices sets the size of the devices payload.
+    Every request is counted per path in requests.
+    """
+
+    def __init__(self, latency: float = 0, error_rate: float = 0, auth_error_rate: float = 0, devices: int = 1, installations: int = 1, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.auth_error_rate = auth_error_rate
+        self.installations = installations
+        self.requests = Counter()
+        self.mode = "solar"
+        self._random = random.Random(seed)
+        self._devices = devices_payload(devices)
+        self._token = 0
+
+        self.app = web.Application()
+        self.app.router.add_post("/oauth/token", self._token_handler)
+        self.app.router.add_get("/api/users/current", self._json(self._current))
+        self.app.router.add_get("/api/hems/set-points", self._json(self._set_points))
+        self.app.router.add_post("/api/hems/set-points", self._update_mode)
+        self.app.router.add_get("/api/hems", self._json(lambda: {"peak_solar_capacity": 5000, "electricity_contract": "dynamic"}))
+        self.app.router.add_get("/api/hems/energy-consumption", self._json(lambda: {"carConsumptionWh": 123456}))
+        self.app.router.add_get("/api/charging-session/employee/active", self._json(self._session))
+        self.app.router.add_get("/api/optimile/devices", self._json(lambda: self._devices))
+        self.server: TestServer | None = None
+
+    async def start(self):
+        """Start serving on a free local port."""
+        self.server = TestServer(self.app)
+        await self.server.start_server()
+
+    async def close(self):
+        """Stop the server."""
+        if self.server:
+            await self.server.close()
+
+    def url(self, url: str) -> str:
+        """Map a real Blossom or Auth0 url onto the fake server."""
+        parts = urlsplit(url)
+        if parts.netloc not in REAL_HOSTS:
+            return url
+        return str(self.server.make_url(parts.path)) + (f"?{parts.query}" if parts.query else "")
+
+    def reset(self):
+        """Forget the counted requests."""
+        self.requests.clear()
+
+    async def _answer(self, request: web.Request, error_rate: float | None = None):
+        """Count the request, wait for the latency and maybe fail."""
+        self.requests[request.path] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        error_rate = self.error_rate if error_rate is None else error_rate
+        if error_rate and self._random.random() < error_rate:
+            raise web.HTTPInternalServerError()
+
+    def _json(self, payload_fn):
+        async def handler(request: web.Request):
+            await self._answer(request)
+            return web.json_response(payload_fn())
+        return handler
+
+    async def _token_handler(self, request: web.Request):
+        await self._answer(request, self.auth_error_rate)
+        self._token += 1
+        return web.json_response({
+            "access_token": f"access-{self._token}",
+            "refresh_token": f"refresh-{self._token}",
+            "expires_in": 86400,
+        })
+
+    async def _update_mode(self, request: web.Request):
+        await self._answer(request)
+        self.mode = (await request.json())["mode"]
+        return web.json_response({}, status=201)
+
+    def _current(self):
+        return {
+            "members": [{"id": f"member-{index}"} for index in range(self.installations)],
+            "installations": [{"id": f"installation-{index}", "name": f"Home {index}"} for index in range(self.installations)],
+        }
+
+    def _set_points(self):
+        return {
+            "user_setting_mode": self.mode,
+            "user_setting_cap_value": 4000,
+            "min_charge_rate": 1400,
+            "current_month_peak": 2500,
+        }
+
+    def _session(self):
+        return [{
+            "deviceStatus": "Charging",
+            "session": {
+                "status": "IN_PROGRESS",
+                "kWh": 12.3,
+                "time_started_session": "2026-10-18T08:00:00+00:00",
+            },
+        }]
+
+
+class FakeApiSession:
+    """Client session sending requests for the real hosts to a FakeBlossomApi.
+
+    Requests still go over HTTP through a real aiohttp session, only the
+    scheme and host of the url are replaced.
+    """
+
+    def __init__(self, fake: FakeBlossomApi):
+        self._fake = fake
+        self._session = ClientSession()
+
+    def get(self, url: str, **kwargs):
+        return self._session.get(self._fake.url(url), **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self._session.post(self._fake.url(url), **kwargs)
+
+    async def close(self):
+        await self._session.close()
@@ -0,0 +1,105 @@
+"""Tests of the token manager against the fake Blossom API."""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.blossom_be import const
+from custom_components.blossom_be.api import BlossomApiClient, BlossomApiError
+from custom_components.blossom_be.auth import BlossomTokenManager
+from tests.fake_blossom import FakeApiSession, FakeBlossomApi
+
+TOKEN_PATH = "/oauth/token"
+
+
+@pytest.fixture
+async def fake_api(socket_enabled):
+    fake = FakeBlossomApi(latency=0.05)
+    await fake.start()
+    yield fake
+    await fake.close()
+
+
+@pytest.fixture
+async def session(fake_api: FakeBlossomApi):
+    session = FakeApiSession(fake_api)
+    yield session
+    await session.close()
+
+
+def token_manager(hass: HomeAssistant, session: FakeApiSession, data: dict) -> BlossomTokenManager:
+    """Return a token manager on the fake API with the given persisted token data."""
+    return BlossomTokenManager(hass, BlossomApiClient(session), Store(hass, 1, f"{const.DOMAIN}_test"), data)
+
+
+async def test_single_flight_refresh(hass: HomeAssistant, fake_api: FakeBlossomApi, session: FakeApiSession, hass_storage):
+    """Concurrent callers share one refresh, and the rotated refresh token is persisted."""
+    tokens = token_manager(hass, session, {const.CONF_REFRESH_TOKEN: "refresh-0"})
+    assert set(await asyncio.gather(*[tokens.async_get_access_token() for _ in range(5)])) == {"access-1"}
+    assert fake_api.requests[TOKEN_PATH] == 1
+    assert tokens.refresh_token == "refresh-1"
+
+    # A valid access token is handed out without a refresh
+    assert await tokens.async_get_access_token() == "access-1"
+    assert fake_api.requests[TOKEN_PATH] == 1
+
+    await tokens.async_shutdown()
+    assert hass_storage[f"{const.DOMAIN}_test"]["data"][const.CONF_REFRESH_TOKEN] == "refresh-1"
+
+
+async def test_proactive_refresh(hass: HomeAssistant, socket_enabled, freezer):
+    """An access token about to expire is refreshed in the background, before any poll needs it."""
+    # Without latency, the frozen clock would keep the response from arriving
+    fake_api = FakeBlossomApi()
+    await fake_api.start()
+    session = FakeApiSession(fake_api)
+    expiry = dt_util.utcnow().timestamp() + const.TOKEN_REFRESH_AHEAD + 60
+    tokens = token_manager(hass, session, {
+        const.CONF_REFRESH_TOKEN: "refresh-0",
+        const.CONF_ACCESS_TOKEN: "access-0",
+        const.CONF_TOKEN_EXPIRY: expiry,
+    })
+    freezer.tick(timedelta(seconds=30))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert not fake_api.requests
+
+    freezer.tick(timedelta(seconds=31))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert fake_api.requests[TOKEN_PATH] == 1
+    assert tokens.access_token == "access-1"
+    assert tokens.expiry > expiry
+    await tokens.async_shutdown()
+    await session.close()
+    await fake_api.close()
+
+
+async def test_set_tokens(hass: HomeAssistant, fake_api: FakeBlossomApi, session: FakeApiSession, hass_storage):
+    """Tokens handed over by a config flow replace the spent ones and are persisted right away."""
+    tokens = token_manager(hass, session, {const.CONF_REFRESH_TOKEN: "spent"})
+    expiry = dt_util.utcnow().timestamp() + 86400
+    await tokens.async_set_tokens({
+        const.CONF_REFRESH_TOKEN: "refresh-9",
+        const.CONF_ACCESS_TOKEN: "access-9",
+        const.CONF_TOKEN_EXPIRY: expiry,
+    })
+    assert await tokens.async_get_access_token() == "access-9"
+    assert not fake_api.requests
+    assert hass_storage[f"{const.DOMAIN}_test"]["data"][const.CONF_REFRESH_TOKEN] == "refresh-9"
+    await tokens.async_shutdown()
+
+
+async def test_token_error_page(hass: HomeAssistant, fake_api: FakeBlossomApi, session: FakeApiSession):
+    """A token response that is no json, like an error page, fails the refresh as an API error."""
+    fake_api.auth_error_rate = 1
+    tokens = token_manager(hass, session, {const.CONF_REFRESH_TOKEN: "refresh-0"})
+    with pytest.raises(BlossomApiError):
+        await tokens.async_get_access_token()
+    assert tokens.refresh_failures == 1
+    assert tokens.refresh_token == "refresh-0"
+    await tokens.async_shutdown()
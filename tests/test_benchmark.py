@@ -0,0 +1,232 @@
+"""Benchmarks of the coordinator and sensors against a local fake Blossom API.
+
+Run with `pytest tests/test_benchmark.py -s` to see the report. The
+assertions only guard the request counts, timings depend on the machine.
+"""
+import statistics
+import time
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import async_get_platforms
+from homeassistant.helpers.storage import Store
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.blossom_be import const
+from custom_components.blossom_be.api import BlossomApiClient
+from custom_components.blossom_be.auth import BlossomTokenManager
+from custom_components.blossom_be.coordinator import ENDPOINTS, BlossomDataUpdateCoordinator
+from custom_components.blossom_be.sensor import SENSOR_TYPES, BlossomSensor
+from tests.fake_blossom import FakeApiSession, FakeBlossomApi
+
+CYCLES = 200
+
+
+def report(title: str, **values):
+    """Print one line of benchmark results."""
+    print(f"\n{title}: " + ", ".join(f"{key}={value}" for key, value in values.items()))
+
+
+def percentile(samples: list[float], percent: int) -> float:
+    """Return a percentile of samples, in milliseconds."""
+    return round(1000 * statistics.quantiles(samples, n=100, method="inclusive")[percent - 1], 3)
+
+
+async def create_coordinator(hass: HomeAssistant, fake: FakeBlossomApi):
+    """Set up the real coordinator, token manager and client on top of fake."""
+    config_entry = MockConfigEntry(domain=const.DOMAIN, data={const.CONF_REFRESH_TOKEN: "refresh-0"})
+    config_entry.add_to_hass(hass)
+    session = FakeApiSession(fake)
+    client = BlossomApiClient(session)
+    store = Store(hass, 1, f"{const.DOMAIN}_benchmark")
+    tokens = BlossomTokenManager(hass, client, store, {const.CONF_REFRESH_TOKEN: "refresh-0"})
+    coordinator = BlossomDataUpdateCoordinator(hass, config_entry, client, tokens)
+    return coordinator, session
+
+
+@pytest.fixture
+async def fake_api(socket_enabled):
+    """Fast fake API without errors, 500 devices per payload."""
+    fake = FakeBlossomApi(devices=500, installations=2)
+    await fake.start()
+    yield fake
+    await fake.close()
+
+
+async def run_cycles(coordinator: BlossomDataUpdateCoordinator, fake: FakeBlossomApi, cycles: int):
+    """Run update cycles, return their durations and the requests each made."""
+    durations, requests = [], []
+    for _ in range(cycles):
+        fake.reset()
+        started = time.perf_counter()
+        coordinator.data = await coordinator._async_update_data()
+        durations.append(time.perf_counter() - started)
+        requests.append(sum(fake.requests.values()))
+    return durations, requests
+
+
+async def test_poll_latency(hass: HomeAssistant, enable_custom_integrations, fake_api: FakeBlossomApi):
+    """Latency of steady state polls and the requests they make."""
+    coordinator, session = await create_coordinator(hass, fake_api)
+
+    # The first cycle resolves the token and identity and fetches every tier
+    _, first = await run_cycles(coordinator, fake_api, 1)
+    durations, requests = await run_cycles(coordinator, fake_api, CYCLES)
+
+    fast_tier = [name for name, interval in coordinator.intervals.items() if interval <= coordinator.base_interval]
+    scoped = [name for name in fast_tier if ENDPOINTS[name][2]]
+    report(
+        "poll latency",
+        p50_ms=percentile(durations, 50),
+        p99_ms=percentile(durations, 99),
+        first_cycle_requests=first[0],
+        requests_per_cycle=statistics.mean(requests),
+    )
+
+    metrics = coordinator.metrics_snapshot()
+    report("endpoint p50 ms", **{
+        name: round(1000 * endpoint["latency_p50"], 3) for name, endpoint in metrics["endpoints"].items()
+    })
+    assert metrics["token_refreshes"] == 1
+    assert metrics["endpoints"]["session"]["requests"] == 2 * (CYCLES + 1)
+
+    # token + /current + every endpoint, scoped ones once per installation
+    assert first[0] == 2 + len(ENDPOINTS) + len([name for name in ENDPOINTS if ENDPOINTS[name][2]])
+    # Only the fast tier is polled after that, no token or identity requests
+    assert requests == [len(scoped) * 2 + len(fast_tier) - len(scoped)] * CYCLES
+    await tokens_shutdown(coordinator, session)
+
+
+async def test_poll_latency_slow_unreliable_api(hass: HomeAssistant, enable_custom_integrations, socket_enabled):
+    """Latency when every response takes 50 ms and one in ten fails."""
+    fake = FakeBlossomApi(latency=0.05, error_rate=0.1, installations=2)
+    await fake.start()
+    coordinator, session = await create_coordinator(hass, fake)
+
+    await run_cycles(coordinator, fake, 1)
+    durations, requests = await run_cycles(coordinator, fake, 50)
+    report(
+        "slow api poll latency",
+        p50_ms=percentile(durations, 50),
+        p99_ms=percentile(durations, 99),
+        requests_per_cycle=statistics.mean(requests),
+    )
+
+    await tokens_shutdown(coordinator, session)
+    await fake.close()
+
+
+async def test_allocations_per_cycle(hass: HomeAssistant, enable_custom_integrations, fake_api: FakeBlossomApi):
+    """Memory allocated by a steady state poll."""
+    coordinator, session = await create_coordinator(hass, fake_api)
+    await run_cycles(coordinator, fake_api, 2)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    await run_cycles(coordinator, fake_api, 10)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = [stat for stat in after.compare_to(before, "filename") if stat.size_diff > 0]
+    report(
+        "allocations per cycle",
+        retained_blocks=sum(stat.count_diff for stat in allocated) // 10,
+        retained_kib=round(sum(stat.size_diff for stat in allocated) / 10 / 1024, 1),
+        peak_kib=round(peak / 1024, 1),
+    )
+    await tokens_shutdown(coordinator, session)
+
+
+async def test_native_value_throughput(hass: HomeAssistant, enable_custom_integrations, fake_api: FakeBlossomApi):
+    """Sensor value extraction on a payload with 500 devices."""
+    coordinator, session = await create_coordinator(hass, fake_api)
+    await run_cycles(coordinator, fake_api, 1)
+    sensors = [
+        BlossomSensor(coordinator, installation, description)
+        for installation in coordinator.installations
+        for description in SENSOR_TYPES
+    ]
+    assert all(sensor.native_value is not None for sensor in sensors)
+
+    rounds = 2000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for sensor in sensors:
+            sensor._attr_native_value = sensor._compute_value()
+    computed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for sensor in sensors:
+            sensor.native_value
+    read = time.perf_counter() - started
+
+    report(
+        "native_value throughput",
+        sensors=len(sensors),
+        computed_per_s=round(rounds * len(sensors) / computed),
+        read_per_s=round(rounds * len(sensors) / read),
+    )
+    await tokens_shutdown(coordinator, session)
+
+
+async def test_state_writes(recorder_mock, hass: HomeAssistant, enable_custom_integrations, socket_enabled):
+    """Updates that leave the sensor values as they were skip their state writes."""
+    # Few devices, the entities of every charging point would dominate the counts
+    fake = FakeBlossomApi(installations=2)
+    await fake.start()
+    config_entry = MockConfigEntry(domain=const.DOMAIN, data={const.CONF_REFRESH_TOKEN: "refresh-0"})
+    config_entry.add_to_hass(hass)
+    session = FakeApiSession(fake)
+    # Without the rate limits of the real API, like the other benchmarks
+    with (
+        patch("custom_components.blossom_be.async_get_clientsession", return_value=session),
+        patch("custom_components.blossom_be.RATE_LIMITS", {}),
+    ):
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+    coordinator = hass.data[const.DOMAIN][config_entry.entry_id]
+    sensors = [
+        entity
+        for platform in async_get_platforms(hass, const.DOMAIN)
+        for entity in platform.entities.values()
+        if isinstance(entity, BlossomSensor)
+    ]
+    assert len(sensors) == len(coordinator.installations) * len(SENSOR_TYPES)
+
+    written = []
+    entity_ids = {sensor.entity_id for sensor in sensors}
+    hass.bus.async_listen(
+        "state_changed", callback(lambda event: written.append(event.data["entity_id"])),
+        callback(lambda event_data: event_data["entity_id"] in entity_ids),
+    )
+    coordinator.state_writes.update(performed=0, skipped=0)
+    for _ in range(10):
+        await coordinator.async_refresh()
+        # As when another endpoint changed
+        coordinator.async_update_listeners()
+    await hass.async_block_till_done()
+
+    report("state writes", **coordinator.state_writes)
+    assert not written
+    assert coordinator.state_writes["skipped"] >= 10 * len(sensors)
+
+    # A changed value is written
+    sensors[0]._attr_native_value += 1
+    sensors[0].async_write_ha_state_if_changed()
+    await hass.async_block_till_done()
+    assert written == [sensors[0].entity_id]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await session.close()
+    await fake.close()
+
+
+async def tokens_shutdown(coordinator: BlossomDataUpdateCoordinator, session: FakeApiSession):
+    """Cancel the token refresh timer and close the client session."""
+    await coordinator.tokens.async_shutdown()
+    await session.close()
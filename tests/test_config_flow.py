@@ -0,0 +1,41 @@
+"""Tests of the config flow."""
+from unittest.mock import patch
+
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.blossom_be import const
+from custom_components.blossom_be.api import BlossomApiClient
+
+TOKEN_RESPONSE = {"access_token": "access-1", "refresh_token": "refresh-1", "expires_in": 86400}
+CURRENT_RESPONSE = {"members": [{"id": "member-0"}], "installations": [{"id": "installation-0", "name": "Home"}]}
+
+
+async def start_flow(hass: HomeAssistant, token_response: dict = TOKEN_RESPONSE):
+    """Run the user step of a new flow with a valid refresh token, Auth0 answering token_response."""
+    with (
+        patch.object(BlossomApiClient, "async_request_token", return_value=token_response),
+        patch.object(BlossomApiClient, "async_get", return_value=(200, CURRENT_RESPONSE, None)),
+        patch("custom_components.blossom_be.async_setup_entry", return_value=True),
+    ):
+        result = await hass.config_entries.flow.async_init(const.DOMAIN, context={"source": config_entries.SOURCE_USER})
+        return await hass.config_entries.flow.async_configure(
+            result["flow_id"], {const.CONF_REFRESH_TOKEN: "refresh-0"}
+        )
+
+
+async def test_account_configured_once(recorder_mock, hass: HomeAssistant, enable_custom_integrations, hass_storage):
+    """The entry keeps the rotated tokens, a second entry of the same account hands its tokens over and aborts."""
+    result = await start_flow(hass)
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert result["result"].unique_id == "member-0"
+    assert result["data"][const.CONF_REFRESH_TOKEN] == "refresh-1"
+    assert result["data"][const.CONF_ACCESS_TOKEN] == "access-1"
+    entry_id = result["result"].entry_id
+
+    result = await start_flow(hass, {"access_token": "access-2", "refresh_token": "refresh-2", "expires_in": 86400})
+    assert result["type"] == FlowResultType.ABORT
+    assert result["reason"] == "already_configured"
+    # The refresh token pasted may have been the one of the existing entry, it continues with the rotated one
+    assert hass_storage[f"{const.DOMAIN}_storage_{entry_id}"]["data"][const.CONF_REFRESH_TOKEN] == "refresh-2"
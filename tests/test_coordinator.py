@@ -0,0 +1,171 @@
+"""Tests of the coordinator against the fake Blossom API."""
+import asyncio
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.blossom_be import const
+from custom_components.blossom_be import coordinator as coordinator_module
+from custom_components.blossom_be.api import HEMS_URL, BlossomApiClient
+from custom_components.blossom_be.auth import BlossomTokenManager
+from custom_components.blossom_be.coordinator import ENDPOINTS, BlossomDataUpdateCoordinator
+from custom_components.blossom_be.ratelimit import TokenBucket
+from tests.fake_blossom import FakeApiSession, FakeBlossomApi, devices_payload
+
+
+@pytest.fixture
+async def fake_api(socket_enabled):
+    fake = FakeBlossomApi()
+    await fake.start()
+    yield fake
+    await fake.close()
+
+
+@pytest.fixture
+async def coordinator(hass: HomeAssistant, enable_custom_integrations, fake_api: FakeBlossomApi):
+    config_entry = MockConfigEntry(domain=const.DOMAIN, data={const.CONF_REFRESH_TOKEN: "refresh-0"})
+    config_entry.add_to_hass(hass)
+    session = FakeApiSession(fake_api)
+    client = BlossomApiClient(session)
+    tokens = BlossomTokenManager(hass, client, Store(hass, 1, f"{const.DOMAIN}_test"), {const.CONF_REFRESH_TOKEN: "refresh-0"})
+    coordinator = BlossomDataUpdateCoordinator(hass, config_entry, client, tokens)
+    yield coordinator
+    await tokens.async_shutdown()
+    await session.close()
+
+
+async def test_serves_last_good_data(coordinator: BlossomDataUpdateCoordinator, fake_api: FakeBlossomApi):
+    """Failing endpoints keep their data, are skipped after a few failures and finally fail the update."""
+    coordinator.data = await coordinator._async_update_data()
+    good = coordinator.data
+
+    fake_api.error_rate = 1
+    for _ in range(const.BREAKER_THRESHOLD):
+        fake_api.reset()
+        assert await coordinator._async_update_data() is good
+        assert sum(fake_api.requests.values()) == 2  # set-points and session
+
+    # The circuits are open now, nothing is requested
+    fake_api.reset()
+    assert await coordinator._async_update_data() is good
+    assert not fake_api.requests
+    assert coordinator.update_interval > timedelta(seconds=coordinator.base_interval)
+
+    # Everything is stale for too long
+    for key, updated in coordinator.endpoint_updated.items():
+        coordinator.endpoint_updated[key] = updated - timedelta(seconds=const.STALE_LIMIT + 1)
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+
+
+async def test_first_update_fails_without_data(coordinator: BlossomDataUpdateCoordinator, fake_api: FakeBlossomApi):
+    """Without any data yet, a failing API fails the update."""
+    fake_api.error_rate = 1
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+
+
+async def test_failed_slow_endpoints_stay_due(coordinator: BlossomDataUpdateCoordinator, fake_api: FakeBlossomApi):
+    """Endpoints of the slow tiers that failed are fetched again on the next update."""
+    assert await coordinator.async_refresh_access_token()
+    assert await coordinator._async_resolve_identity()
+    fake_api.error_rate = 1
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+    assert not coordinator.endpoint_fetched
+
+    fake_api.error_rate = 0
+    fake_api.reset()
+    coordinator.data = await coordinator._async_update_data()
+    assert {"/api/hems", "/api/hems/energy-consumption", "/api/optimile/devices"} <= set(fake_api.requests)
+    assert set(coordinator.endpoint_fetched) == set(ENDPOINTS)
+
+
+async def test_history_without_account_ids(coordinator: BlossomDataUpdateCoordinator):
+    """The /current payload in the diagnostics history holds counts, not the account's ids."""
+    assert await coordinator._async_resolve_identity()
+    item = next(item for item in coordinator.history if item["endpoint"] == "/current")
+    assert item["payload"] == {"members": 1, "installations": 1}
+
+
+async def test_unchanged_body_not_decoded(coordinator: BlossomDataUpdateCoordinator):
+    """A body with the digest of the previous response comes back as unchanged, without its json."""
+    client = coordinator.client
+    status, data, validators = await client.async_get(HEMS_URL, "access")
+    assert status == 200 and data and validators[2]
+    assert await client.async_get(HEMS_URL, "access", None, validators) == (304, None, validators)
+
+
+async def test_rate_limit_wait_is_no_timeout(coordinator: BlossomDataUpdateCoordinator):
+    """Requests queued behind the rate limit for longer than their timeout are not timeouts."""
+    coordinator.client._rate_limits[urlsplit(HEMS_URL).netloc] = TokenBucket(rate=20, burst=1)
+    # The last request waits 0.25 seconds for its turn
+    results = await asyncio.gather(*[coordinator._async_fetch("hems", HEMS_URL, timeout=0.1) for _ in range(6)])
+    assert [status for status, _, _ in results] == [200] * 6
+    assert coordinator.metrics_snapshot()["endpoints"]["hems"]["statuses"] == {"200": 6}
+
+
+async def test_background_refresh_waits_for_the_lock(hass: HomeAssistant, coordinator: BlossomDataUpdateCoordinator,
+                                                    fake_api: FakeBlossomApi):
+    """A background refresh fetches alongside a poll or mode change, but stores its responses after it."""
+    coordinator.data = await coordinator._async_update_data()
+    devices = coordinator.endpoint_data[(None, "devices")]
+    fake_api._devices = devices_payload(2)
+
+    async with coordinator._lock:
+        task = hass.async_create_task(coordinator._async_refresh_in_background(["devices"], time.monotonic()))
+        # The first update fetched the devices once
+        while fake_api.requests["/api/optimile/devices"] < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        assert coordinator.endpoint_data[(None, "devices")] is devices
+    await task
+    assert coordinator.endpoint_data[(None, "devices")] is not devices
+    assert len(coordinator.device_index.charging_points) == 4
+
+
+async def test_mode_changes_coalesce(coordinator: BlossomDataUpdateCoordinator, fake_api: FakeBlossomApi, monkeypatch):
+    """Rapid mode changes send only the last one, then read back only the set-points, also while polling."""
+    monkeypatch.setattr(coordinator_module, "MODE_COMMAND_DELAY", 0.05)
+    coordinator.data = await coordinator._async_update_data()
+    installation_id = coordinator.installations[0][const.CONF_INSTALLATION_ID]
+
+    fake_api.reset()
+    await asyncio.gather(
+        coordinator.async_queue_mode(installation_id, "standard"),
+        coordinator.async_queue_mode(installation_id, "cap", 4000),
+        coordinator.async_queue_mode(installation_id, "autopilot"),
+    )
+    assert fake_api.mode == "autopilot"
+    assert fake_api.requests == {"/api/hems/set-points": 2}  # One write, one read back
+    assert not coordinator.pending_modes
+    assert coordinator.data[installation_id].set_points.mode == "autopilot"
+
+    # A poll running while a change is queued doesn't overtake the write
+    fake_api.reset()
+    await asyncio.gather(
+        coordinator.async_queue_mode(installation_id, "solar"),
+        coordinator.async_refresh(),
+    )
+    assert fake_api.mode == "solar"
+    assert coordinator.data[installation_id].set_points.mode == "solar"
+
+
+async def test_warm_start(hass: HomeAssistant, coordinator: BlossomDataUpdateCoordinator, fake_api: FakeBlossomApi):
+    """A new coordinator starts with the persisted data and only polls what is due."""
+    coordinator.data = await coordinator._async_update_data()
+    await coordinator.async_flush_snapshot()
+
+    restored = BlossomDataUpdateCoordinator(hass, coordinator.config_entry, coordinator.client, coordinator.tokens)
+    assert await restored.async_restore_snapshot()
+    assert restored.data == coordinator.data
+
+    fake_api.reset()
+    await restored._async_update_data()
+    assert set(fake_api.requests) == {"/api/hems/set-points", "/api/charging-session/employee/active"}
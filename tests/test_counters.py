@@ -0,0 +1,60 @@
+"""Tests of the batched counters."""
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.counters.const import DOMAIN
+
+
+async def test_increments_are_batched(hass: HomeAssistant, enable_custom_integrations):
+    """A burst of increments of several counters is written once, when the window has passed."""
+    hass.states.async_set("sensor.my_counter", "41")
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: {"window": 5}})
+    written = []
+    hass.bus.async_listen("state_changed", callback(lambda event: written.append(event.data["entity_id"])))
+
+    for _ in range(10):
+        await hass.services.async_call(
+            DOMAIN, "increment", {"entity_id": ["sensor.my_counter", "sensor.other_counter"]}, blocking=True
+        )
+    await hass.services.async_call(DOMAIN, "increment", {"entity_id": "sensor.other_counter", "amount": 5}, blocking=True)
+    await hass.async_block_till_done()
+    assert not written
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert sorted(written) == ["sensor.my_counter", "sensor.other_counter"]
+    # The counter started at the state of the python script
+    assert hass.states.get("sensor.my_counter").state == "51"
+    assert hass.states.get("sensor.other_counter").state == "15"
+
+
+async def test_restored_after_restart(hass: HomeAssistant, enable_custom_integrations, hass_storage):
+    """The stored values are written at setup and counted on."""
+    hass_storage[DOMAIN] = {"version": 1, "key": DOMAIN, "data": {"sensor.my_counter": 7}}
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: {"window": 0}})
+    assert hass.states.get("sensor.my_counter").state == "7"
+
+    await hass.services.async_call(DOMAIN, "increment", {"entity_id": "sensor.my_counter"}, blocking=True)
+    assert hass.states.get("sensor.my_counter").state == "8"
+
+
+async def test_default_window(hass: HomeAssistant, enable_custom_integrations):
+    """A bare counters: entry sets up with the default window."""
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: None})
+    assert hass.data[DOMAIN].window == 1
+
+
+async def test_saved_during_steady_increments(hass: HomeAssistant, enable_custom_integrations, hass_storage, freezer):
+    """Increments closer together than the save delay don't hold back the save."""
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: {"window": 0}})
+    for _ in range(3):
+        await hass.services.async_call(DOMAIN, "increment", {"entity_id": "sensor.my_counter"}, blocking=True)
+        freezer.tick(timedelta(seconds=6))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+    # Saved 10 seconds after the first increment
+    assert hass_storage[DOMAIN]["data"] == {"sensor.my_counter": 2}
@@ -0,0 +1,46 @@
+"""Tests of the config entry setup."""
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.blossom_be import LEGACY_STORAGE_KEY, _async_initial_tokens, async_remove_entry, const
+
+
+def token_store(hass: HomeAssistant, entry: MockConfigEntry) -> Store:
+    """Return the token store of entry."""
+    return Store(hass, 1, f"{const.DOMAIN}_storage_{entry.entry_id}")
+
+
+async def test_legacy_tokens_move_to_the_first_entry(hass: HomeAssistant, hass_storage):
+    """Only the first entry created before the per entry stores takes over the shared store."""
+    legacy = {const.CONF_REFRESH_TOKEN: "rotated", const.CONF_ACCESS_TOKEN: "access", const.CONF_TOKEN_EXPIRY: 1}
+    hass_storage[LEGACY_STORAGE_KEY] = {"version": 1, "key": LEGACY_STORAGE_KEY, "data": legacy}
+    first = MockConfigEntry(domain=const.DOMAIN, data={const.CONF_REFRESH_TOKEN: "spent"})
+    second = MockConfigEntry(domain=const.DOMAIN, data={const.CONF_REFRESH_TOKEN: "other"})
+
+    assert await _async_initial_tokens(hass, first, token_store(hass, first)) == legacy
+    assert (await _async_initial_tokens(hass, second, token_store(hass, second)))[const.CONF_REFRESH_TOKEN] == "other"
+    assert LEGACY_STORAGE_KEY not in hass_storage
+    assert await token_store(hass, first).async_load() == legacy
+
+
+async def test_new_entry_uses_flow_tokens(hass: HomeAssistant, hass_storage):
+    """An entry of the current config flow starts with the tokens it was created with."""
+    hass_storage[LEGACY_STORAGE_KEY] = {"version": 1, "key": LEGACY_STORAGE_KEY, "data": {const.CONF_REFRESH_TOKEN: "old"}}
+    data = {const.CONF_REFRESH_TOKEN: "refresh-1", const.CONF_ACCESS_TOKEN: "access-1", const.CONF_TOKEN_EXPIRY: 1}
+    entry = MockConfigEntry(domain=const.DOMAIN, data=data)
+
+    assert await _async_initial_tokens(hass, entry, token_store(hass, entry)) == data
+    assert LEGACY_STORAGE_KEY in hass_storage
+
+
+async def test_remove_entry_stores(hass: HomeAssistant, hass_storage):
+    """Removing an entry removes every store of the entry, and only those."""
+    entry = MockConfigEntry(domain=const.DOMAIN, entry_id="removed")
+    keys = [f"{const.DOMAIN}_{name}_{entry_id}" for name in ("storage", "snapshot", "sessions", "statistics", "cassette")
+            for entry_id in ("removed", "other")]
+    for key in keys:
+        hass_storage[key] = {"version": 1, "key": key, "data": {}}
+
+    await async_remove_entry(hass, entry)
+    assert [key for key in keys if key in hass_storage] == [key for key in keys if key.endswith("other")]
@@ -0,0 +1,25 @@
+"""Tests of the response snapshots."""
+from custom_components.blossom_be.models import PARSERS, DeviceIndex, parse_devices, to_json
+from tests.fake_blossom import devices_payload
+
+
+def test_device_index():
+    """Charging points and energy components are found by id, whatever their position."""
+    devices = parse_devices(devices_payload(3))
+    index = DeviceIndex(devices)
+    assert len(index.charging_points) == 6
+    assert len(index.components) == 18
+
+    device, point = index.charging_points["cp-2-1"]
+    assert device.id == "device-2"
+    assert index.components[("cp-2-1", "ec-2-1-2")].price == 0.27
+
+    # Reordering the payload doesn't move values to other ids
+    reordered = DeviceIndex(parse_devices(list(reversed(devices_payload(3)))))
+    assert reordered.components == index.components
+
+
+def test_snapshot_round_trip():
+    """Persisted snapshots restore to equal objects."""
+    devices = parse_devices(devices_payload(2))
+    assert PARSERS["devices"][1](to_json(devices)) == devices
@@ -0,0 +1,35 @@
+"""Tests of the people home sensor."""
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from custom_components.people_home.const import ATTR_PEOPLE, DOMAIN
+
+
+async def test_people_home(hass: HomeAssistant, enable_custom_integrations):
+    """The count follows the trackers arriving home and leaving, other changes don't write the state."""
+    hass.states.async_set("device_tracker.anna", "home", {"friendly_name": "Anna"})
+    hass.states.async_set("device_tracker.ben", "not_home", {"friendly_name": "Ben"})
+    assert await async_setup_component(hass, "sensor", {"sensor": {"platform": DOMAIN}})
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.people_home")
+    assert state.state == "1"
+    assert state.attributes[ATTR_PEOPLE] == ["Anna"]
+
+    hass.states.async_set("device_tracker.ben", "home", {"friendly_name": "Ben"})
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.people_home")
+    assert state.state == "2"
+    assert state.attributes[ATTR_PEOPLE] == ["Anna", "Ben"]
+
+    # Still home, the sensor is not written again
+    hass.states.async_set("device_tracker.ben", "home", {"friendly_name": "Ben", "battery": 80})
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.people_home").last_updated == state.last_updated
+
+    hass.states.async_remove("device_tracker.anna")
+    hass.states.async_set("device_tracker.ben", "work", {"friendly_name": "Ben"})
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.people_home")
+    assert state.state == "0"
+    assert state.attributes[ATTR_PEOPLE] == []
@@ -0,0 +1,40 @@
+"""Tests of the shared token bucket."""
+import asyncio
+import time
+
+from custom_components.blossom_be.ratelimit import TokenBucket, parse_retry_after
+
+
+async def test_owners_take_turns():
+    """Queued requests of two owners are served alternately, within the rate."""
+    bucket = TokenBucket(rate=50, burst=1)
+    served = []
+
+    async def request(owner: str):
+        await bucket.acquire(owner)
+        served.append(owner)
+
+    started = time.monotonic()
+    await asyncio.gather(*[request("busy") for _ in range(4)], request("quiet"), request("quiet"))
+    # The first request takes the only token, then the owners alternate
+    assert served == ["busy", "busy", "quiet", "busy", "quiet", "busy"]
+    # Five more tokens at 50 per second
+    assert time.monotonic() - started >= 0.09
+
+
+async def test_pause():
+    """A pause holds back requests even when tokens are left."""
+    bucket = TokenBucket(rate=100, burst=10)
+    bucket.pause(0.1)
+    assert bucket.retry_after > 0
+    started = time.monotonic()
+    await bucket.acquire("entry")
+    assert time.monotonic() - started >= 0.1
+
+
+def test_parse_retry_after():
+    """Retry-After is given in seconds or as an HTTP date."""
+    assert parse_retry_after("30") == 30
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,74 @@
+"""Tests of the charging rates derived from the kWh counters."""
+from datetime import timedelta
+
+import pytest
+from homeassistant.util import dt as dt_util
+
+from custom_components.blossom_be.const import CONF_INSTALLATION_ID
+from custom_components.blossom_be.models import ChargingSession, InstallationData
+from custom_components.blossom_be.rates import BlossomChargingRates, RateTracker
+
+INSTALLATIONS = [{CONF_INSTALLATION_ID: "installation-0"}]
+
+
+def test_rate_over_window():
+    """The rate is the increase per hour over the window, and drops while the counter stands still."""
+    tracker = RateTracker(window=900)
+    assert tracker.rate(0) is None
+    for minute in range(11):
+        tracker.add(minute * 60, 0.1 * minute, "session-1")
+    assert round(tracker.rate(600), 3) == 6.0  # 1 kWh in 10 minutes
+    assert round(tracker.increase(600), 3) == 1.0
+
+    # No new samples, the anchor moves to the window start
+    assert round(tracker.rate(1500), 3) == 0.0
+
+
+def test_session_reset():
+    """A new session restarts the counter, its kWh count from zero."""
+    tracker = RateTracker(window=3600)
+    tracker.add(0, 10.0, "session-1")
+    tracker.add(600, 11.0, "session-1")
+    tracker.add(1200, 0.5, "session-2")
+    tracker.add(1800, 1.5, "session-2")
+    assert round(tracker.increase(1800), 3) == 2.5
+
+
+def test_month_rollover():
+    """The monthly counter dropping at a new month counts from zero again."""
+    tracker = RateTracker(window=3600)
+    tracker.add(0, 250.0)
+    tracker.add(600, 250.4)
+    tracker.add(1200, 0.2)
+    assert round(tracker.increase(1200), 3) == 0.6
+
+
+def test_bounded():
+    """The ring buffer keeps at most maxlen samples."""
+    tracker = RateTracker(window=10 ** 9, maxlen=8)
+    for second in range(100):
+        tracker.add(second, second / 100)
+    assert len(tracker._samples) == 8
+
+
+def session_data(kwh: float) -> dict[str, InstallationData]:
+    """Return coordinator data with an active session at kwh."""
+    session = ChargingSession(device_status="Charging", status="IN_PROGRESS", kwh=kwh, started="2026-10-18T08:00:00+00:00")
+    return {"installation-0": InstallationData(set_points=None, hems=None, consumption=None, session=session, devices=None)}
+
+
+def test_warm_start():
+    """Data restored at startup is sampled at the time it was fetched, not when it was restored."""
+    rates = BlossomChargingRates(target_kwh=20)
+    key = ("installation-0", "session")
+    # Persisted ten minutes ago, before the restart
+    rates.async_update(INSTALLATIONS, session_data(10.0), {key: dt_util.utcnow() - timedelta(minutes=10)})
+    # The first live poll, 2 kWh were charged during the restart
+    rates.async_update(INSTALLATIONS, session_data(12.0), {key: dt_util.utcnow()})
+
+    assert rates.power("installation-0") == pytest.approx(12, rel=0.01)
+    assert rates.time_to_target("installation-0") == pytest.approx(40, rel=0.01)
+
+    # A sample older than the last one is ignored
+    rates.async_update(INSTALLATIONS, session_data(12.0), {key: dt_util.utcnow() - timedelta(minutes=1)})
+    assert rates.power("installation-0") == pytest.approx(12, rel=0.01)
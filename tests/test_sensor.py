@@ -1,267 +1,76 @@
-from datetime import datetime, timedelta
-from unittest.mock import patch
+"""Tests of the sensor values against the fake Blossom API."""
+from datetime import datetime, timezone
 
 import pytest
-from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_registry
-from homeassistant.helpers.entity import generate_entity_id
-from homeassistant.util import dt
-from pytest_homeassistant_custom_component.common import (
-    async_fire_time_changed,
-    MockConfigEntry,
-)
-from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+from homeassistant.helpers.storage import Store
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.frank_energie import const, sensor
-from tests.utils import ResponseMocks
+from custom_components.blossom_be import const
+from custom_components.blossom_be.api import BlossomApiClient
+from custom_components.blossom_be.auth import BlossomTokenManager
+from custom_components.blossom_be.coordinator import BlossomDataUpdateCoordinator
+from custom_components.blossom_be.sensor import SENSOR_TYPES, BlossomPollIntervalSensor, BlossomSensor
+from tests.fake_blossom import FakeApiSession, FakeBlossomApi
 
 
 @pytest.fixture
-async def frank_energie_config_entry(hass: HomeAssistant, enable_custom_integrations):
-    config_entry = MockConfigEntry(
-        domain=const.DOMAIN,
-        data={},
-        unique_id=const.UNIQUE_ID,
-    )
+async def coordinator(hass: HomeAssistant, enable_custom_integrations, socket_enabled):
+    fake = FakeBlossomApi()
+    await fake.start()
+    config_entry = MockConfigEntry(domain=const.DOMAIN, data={const.CONF_REFRESH_TOKEN: "refresh-0"})
     config_entry.add_to_hass(hass)
-
-    return config_entry
-
-
-@pytest.fixture
-def aioclient_responses(aioclient_mock: AiohttpClientMocker, socket_enabled):
-    responses = ResponseMocks()
-
-    async def next_response(*_):
-        return next(responses)
-
-    aioclient_mock.post(const.DATA_URL, side_effect=next_response)
-
-    return responses
-
-
-def price_generator(base: float, var: float) -> list:
-    """
-    Return a list of 24 prices which has two peaks of price `base` and 3 bottoms of `base - 6 * var`.
-    :param base:
-    :param var:
-    :return:
-    """
-    return [round(base - var * abs(6 - (i % 12)), 3) for i in range(24)]
-
-
-async def enable_all_sensors(hass):
-    """Enable all sensors of the integration."""
-    er = entity_registry.async_get(hass)
-    for sensor_type in sensor.SENSOR_TYPES:
-        if sensor_type.entity_registry_enabled_default is False:
-            entity_id = generate_entity_id("sensor.{}", sensor_type.name, hass=hass)
-            er.async_update_entity(entity_id, disabled_by=None)
-    await hass.async_block_till_done()
-    await trigger_update(hass)
-
-
-async def trigger_update(hass, delta_seconds=config_entries.RELOAD_AFTER_UPDATE_DELAY):
-    """Trigger a reload of the data"""
-    async_fire_time_changed(
-        hass,
-        dt.utcnow() + timedelta(seconds=delta_seconds + 1),
-    )
-    await hass.async_block_till_done()
-
-
-@patch("frank_energie.price_data.dt.now")
-async def test_sensors(
-    dt_mock,
-    aioclient_responses: ResponseMocks,
-    frank_energie_config_entry: MockConfigEntry,
-    hass: HomeAssistant,
-):
-    hass.config.set_time_zone("Europe/Amsterdam")
-    dt_mock.return_value = (
-        datetime.utcnow()
-        .replace(hour=14, minute=15, second=0, microsecond=0)
-        .astimezone()
-    )
-    start_of_day = datetime.utcnow().replace(hour=0, minute=0)
-    aioclient_responses.add(
-        start_of_day,
-        [0.2] * 10 + [0.25, 0.3, 0.5, 0.4] + [0.15] * 10,
-        [1.75] * 6 + [1.23] * 18,
-    )
-    aioclient_responses.add(
-        start_of_day + timedelta(days=1),
-        [0.3] * 12 + [0.15] * 12,
-        [1.23] * 24,
-    )
-    aioclient_responses.cyclic()
-
-    await hass.config_entries.async_setup(frank_energie_config_entry.entry_id)
-    await hass.async_block_till_done()
-
-    # Check the state of all sensors which are enabled by default
-    assert hass.states.get("sensor.current_electricity_price_all_in").state == "0.15"
-    assert hass.states.get("sensor.current_electricity_market_price").state == "0.105"
-    assert (
-        hass.states.get("sensor.current_electricity_price_including_tax").state
-        == "0.1125"
-    )
-    assert hass.states.get("sensor.current_gas_price_all_in").state == "1.23"
-    assert hass.states.get("sensor.current_gas_market_price").state == "0.861"
-    assert hass.states.get("sensor.current_gas_price_including_tax").state == "0.9225"
-    assert hass.states.get("sensor.lowest_gas_price_today").state == "1.23"
-    assert hass.states.get("sensor.highest_gas_price_today").state == "1.75"
-    assert hass.states.get("sensor.lowest_energy_price_today").state == "0.15"
-    assert hass.states.get("sensor.highest_energy_price_today").state == "0.5"
-    assert hass.states.get("sensor.average_electricity_price_today").state == "0.20625"
-
-    # Check that the disabled sensors are None
-    assert hass.states.get("sensor.current_electricity_vat_price") is None
-    assert hass.states.get("sensor.current_electricity_sourcing_markup") is None
-    assert hass.states.get("sensor.current_electricity_tax_only") is None
-    assert hass.states.get("sensor.current_gas_vat_price") is None
-    assert hass.states.get("sensor.current_gas_sourcing_price") is None
-    assert hass.states.get("sensor.current_gas_tax_only") is None
-
-    # Enable all sensor and check their expected values
-    await enable_all_sensors(hass)
-    assert hass.states.get("sensor.current_electricity_vat_price").state == "0.0075"
-    assert (
-        hass.states.get("sensor.current_electricity_sourcing_markup").state == "0.015"
-    )
-    assert hass.states.get("sensor.current_electricity_tax_only").state == "0.0225"
-    assert hass.states.get("sensor.current_gas_vat_price").state == "0.0615"
-    assert hass.states.get("sensor.current_gas_sourcing_price").state == "0.123"
-    assert hass.states.get("sensor.current_gas_tax_only").state == "0.1845"
-
-
-@patch("frank_energie.price_data.dt.now")
-async def test_sensors_get_data_of_current_hour(
-    dt_mock,
-    aioclient_responses: ResponseMocks,
-    frank_energie_config_entry: MockConfigEntry,
-    hass: HomeAssistant,
-):
-    hass.config.set_time_zone("Europe/Amsterdam")
-    dt_mock.return_value = (
-        datetime.utcnow()
-        .replace(hour=5, minute=15, second=0, microsecond=0)
-        .astimezone()
-    )
-    start_of_day = datetime.utcnow().replace(hour=0, minute=0)
-    aioclient_responses.add(
-        start_of_day, [0.3] * 12 + [0.15] * 12, [1.75] * 6 + [1.23] * 18
-    )
-    aioclient_responses.add(
-        start_of_day + timedelta(days=1),
-        [0.25] * 12 + [0.1] * 12,
-        [1.23] * 6 + [1.11] * 18,
-    )
-    aioclient_responses.cyclic()
-
-    await hass.config_entries.async_setup(frank_energie_config_entry.entry_id)
-    await hass.async_block_till_done()
-
-    # Check the state at 5:15
-    assert hass.states.get("sensor.current_electricity_price_all_in").state == "0.3"
-    assert hass.states.get("sensor.current_gas_price_all_in").state == "1.75"
-
-    # Change time to 12:15
-    dt_mock.return_value = (
-        datetime.utcnow()
-        .replace(hour=12, minute=15, second=0, microsecond=0)
-        .astimezone()
-    )
-    await trigger_update(hass, 7 * 3600)
-
-    assert hass.states.get("sensor.current_electricity_price_all_in").state == "0.15"
-    assert hass.states.get("sensor.current_gas_price_all_in").state == "1.23"
-
-
-@patch("frank_energie.price_data.dt.now")
-async def test_sensors_no_data_for_tomorrow(
-    dt_mock,
-    aioclient_responses: ResponseMocks,
-    frank_energie_config_entry: MockConfigEntry,
-    hass: HomeAssistant,
-):
-    hass.config.set_time_zone("Europe/Amsterdam")
-    dt_mock.return_value = (
-        datetime.utcnow()
-        .replace(hour=20, minute=0, second=0, microsecond=0)
-        .astimezone()
-    )
-    start_of_day = datetime.utcnow().replace(hour=0, minute=0)
-
-    # First response is for today's data, 2nd for tomorrow's data
-    aioclient_responses.add(start_of_day, [0.3] * 24, [1.75] * 6 + [1.23] * 18)
-    aioclient_responses.add(start_of_day + timedelta(days=1), [], [])
-
-    await hass.config_entries.async_setup(frank_energie_config_entry.entry_id)
-    await hass.async_block_till_done()
-
-    # Check the state at 5:15
-    assert hass.states.get("sensor.current_electricity_price_all_in").state == "0.3"
-    assert hass.states.get("sensor.current_gas_price_all_in").state == "1.23"
-
-
-@patch("frank_energie.price_data.dt.now")
-async def test_sensors_hour_price_attr(
-    dt_mock,
-    aioclient_responses: ResponseMocks,
-    frank_energie_config_entry: MockConfigEntry,
-    hass: HomeAssistant,
-):
-    hass.config.set_time_zone("Europe/Amsterdam")
-    dt_mock.return_value = (
-        datetime.utcnow()
-        .replace(hour=20, minute=0, second=0, microsecond=0)
-        .astimezone()
-    )
-    start_of_day = datetime.utcnow().replace(hour=0, minute=0)
-
-    # First response is for today's data, 2nd for tomorrow's data
-    aioclient_responses.add(
-        start_of_day, price_generator(0.25, 0.05), gas_prices=[1.75] * 6 + [1.23] * 18
-    )
-    aioclient_responses.add(
-        start_of_day + timedelta(days=1),
-        price_generator(0.3, 0.02),
-        gas_prices=[1.23] * 6 + [0.75] * 18,
-    )
-
-    await hass.config_entries.async_setup(frank_energie_config_entry.entry_id)
-    await hass.async_block_till_done()
-
-    # Check the all in electricity prices
-    price_attr = [
-        a["price"]
-        for a in hass.states.get("sensor.current_electricity_price_all_in").attributes[
-            "prices"
-        ]
-    ]
-    assert price_attr == price_generator(0.25, 0.05) + price_generator(0.3, 0.02)
-
-    # Check the all in electricity prices
-    price_attr = [
-        a["price"]
-        for a in hass.states.get("sensor.current_gas_price_all_in").attributes["prices"]
-    ]
-    assert price_attr == [1.75] * 6 + [1.23] * 24 + [0.75] * 18
-
-    # For the other sensors just check if the prices attribute is there
-    assert 48 == len(
-        hass.states.get("sensor.current_electricity_market_price").attributes["prices"]
-    )
-    assert 48 == len(
-        hass.states.get("sensor.current_electricity_price_including_tax").attributes[
-            "prices"
-        ]
-    )
-    assert 48 == len(
-        hass.states.get("sensor.current_gas_market_price").attributes["prices"]
-    )
-    assert 48 == len(
-        hass.states.get("sensor.current_gas_price_including_tax").attributes["prices"]
-    )
+    session = FakeApiSession(fake)
+    client = BlossomApiClient(session)
+    tokens = BlossomTokenManager(hass, client, Store(hass, 1, f"{const.DOMAIN}_test"), {const.CONF_REFRESH_TOKEN: "refresh-0"})
+    coordinator = BlossomDataUpdateCoordinator(hass, config_entry, client, tokens)
+    coordinator.data = await coordinator._async_update_data()
+    yield coordinator
+    await tokens.async_shutdown()
+    await session.close()
+    await fake.close()
+
+
+def sensors(coordinator: BlossomDataUpdateCoordinator) -> dict[str, BlossomSensor]:
+    """Return the sensors of the first installation by key."""
+    installation = coordinator.installations[0]
+    return {description.key: BlossomSensor(coordinator, installation, description) for description in SENSOR_TYPES}
+
+
+async def test_sensor_values(coordinator: BlossomDataUpdateCoordinator):
+    """Every sensor reads its value from the installation snapshot."""
+    assert {key: sensor.native_value for key, sensor in sensors(coordinator).items()} == {
+        "peak_solar_capacity": 5000,
+        "electricity_contract": "dynamic",
+        "user_setting_cap_value": 4000,
+        "min_charge_rate": 1400,
+        "current_month_peak": 2500,
+        "monthly_energy_consumption": 123456,
+        "last_session_status": "in_progress",
+        "last_session_consumption": 12.3,
+        "last_session_start": datetime(2026, 10, 18, 8, 0, tzinfo=timezone.utc),
+        "home_charging_status": "Charging",
+        "energy_component_price": 0.25,
+    }
+
+
+async def test_no_active_session(coordinator: BlossomDataUpdateCoordinator):
+    """Without a session the status says so and the consumption keeps its last value."""
+    existing = sensors(coordinator)
+    installation_id = coordinator.installations[0][const.CONF_INSTALLATION_ID]
+    coordinator.endpoint_data[(installation_id, "session")] = None
+    coordinator.data = coordinator._build_data()
+
+    assert existing["last_session_status"]._compute_value() == "not_active"
+    assert existing["last_session_consumption"]._compute_value() == 12.3
+    # Nothing to keep after a restart, without a session history
+    assert sensors(coordinator)["last_session_consumption"].native_value == 0
+
+
+async def test_unique_ids(coordinator: BlossomDataUpdateCoordinator):
+    """Only the sensors from before multi-installation support keep their bare key as unique id."""
+    installation = coordinator.installations[0]
+    installation_id = installation[const.CONF_INSTALLATION_ID]
+    assert sensors(coordinator)["peak_solar_capacity"].unique_id == "peak_solar_capacity"
+    # Added later, another account would create the same id
+    assert BlossomPollIntervalSensor(coordinator, installation).unique_id == f"{installation_id}_poll_interval"
@@ -0,0 +1,56 @@
+"""Tests of the hourly statistics of the energy counters."""
+from datetime import datetime, timezone
+
+import pytest
+
+from custom_components.blossom_be.statistics_import import HourlyCounter
+
+
+def at(hour: int, minute: int) -> datetime:
+    """Return a UTC time of the test day."""
+    return datetime(2026, 10, 18, hour, minute, tzinfo=timezone.utc)
+
+
+def sums(rows: list) -> list:
+    """Return the (hour, sum) of rows."""
+    return [(row["start"].hour, pytest.approx(row["sum"])) for row in rows]
+
+
+def test_hours_closed_with_the_sum_before_the_sample():
+    """Energy of a sample counts for the hour of the sample, completed hours are imported once."""
+    counter = HourlyCounter()
+    assert counter.add(5.0, "session-1", at(10, 15)) == []
+    assert counter.watermark == at(9, 0)
+    assert counter.add(6.0, "session-1", at(10, 45)) == []
+
+    rows = counter.add(7.0, "session-1", at(11, 10))
+    assert sums(rows) == [(10, 1.0)]
+    assert rows[0]["state"] == 6.0
+    assert counter.watermark == at(10, 0)
+    assert counter.add(7.5, "session-1", at(11, 30)) == []
+
+
+def test_restarts():
+    """A new period key, or a lower value, counts the new value from zero."""
+    counter = HourlyCounter()
+    counter.add(5.0, "session-1", at(10, 0))
+    counter.add(0.5, "session-2", at(10, 10))
+    counter.add(0.3, "session-2", at(10, 20))
+    assert counter.sum == pytest.approx(0.8)
+
+
+def test_backfill_after_downtime():
+    """Hours without samples are imported with an unchanged sum, also after a restore."""
+    counter = HourlyCounter()
+    counter.add(1.0, None, at(10, 5))
+    counter.add(2.0, None, at(10, 50))
+    restored = HourlyCounter(counter.as_dict())
+
+    rows = restored.add(4.0, None, at(14, 5))
+    assert sums(rows) == [(10, 1.0), (11, 1.0), (12, 1.0), (13, 1.0)]
+    assert restored.watermark == at(13, 0)
+    assert restored.sum == pytest.approx(3.0)
+
+    # Missing values still close the hours
+    assert sums(restored.add(None, None, at(15, 1))) == [(14, 3.0)]
+    assert restored.value == 4.0
@@ -0,0 +1,60 @@
+"""Record the fake Blossom API to a cassette and replay it."""
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.blossom_be import const
+from custom_components.blossom_be.auth import BlossomTokenManager
+from custom_components.blossom_be.coordinator import BlossomDataUpdateCoordinator
+from custom_components.blossom_be.transport import REDACTED, BlossomRecordingClient, BlossomReplayClient
+from tests.fake_blossom import FakeApiSession, FakeBlossomApi
+
+
+def create_coordinator(hass: HomeAssistant, client) -> BlossomDataUpdateCoordinator:
+    """Set up the real coordinator and token manager on top of client."""
+    config_entry = MockConfigEntry(domain=const.DOMAIN, data={const.CONF_REFRESH_TOKEN: "refresh-0"})
+    config_entry.add_to_hass(hass)
+    tokens = BlossomTokenManager(hass, client, Store(hass, 1, f"{const.DOMAIN}_test"), {const.CONF_REFRESH_TOKEN: "refresh-0"})
+    return BlossomDataUpdateCoordinator(hass, config_entry, client, tokens)
+
+
+async def test_record_and_replay(hass: HomeAssistant, enable_custom_integrations, socket_enabled):
+    """A replayed cassette gives the coordinator the recorded data, under aliased ids."""
+    fake = FakeBlossomApi(latency=0.02, installations=2)
+    await fake.start()
+    session = FakeApiSession(fake)
+    recorder = BlossomRecordingClient(session, Store(hass, 1, f"{const.DOMAIN}_cassette_test"))
+    coordinator = create_coordinator(hass, recorder)
+    for _ in range(3):
+        coordinator.data = await coordinator._async_update_data()
+    recorded = coordinator.data
+    await coordinator.tokens.async_shutdown()
+    await recorder.async_close()
+    await session.close()
+    await fake.close()
+
+    entries = recorder._data_to_save()["entries"]
+    token = next(entry for entry in entries if entry["url"] == "https://blossom-production.eu.auth0.com/oauth/token")
+    assert token["data"]["refresh_token"] == REDACTED
+    assert all("installation-0" not in str(entry) for entry in entries)
+    assert all(entry["duration"] >= 0.02 for entry in entries)
+
+    # As fast as possible
+    replay = BlossomReplayClient(entries)
+    coordinator = create_coordinator(hass, replay)
+    started = time.perf_counter()
+    for _ in range(3):
+        coordinator.data = await coordinator._async_update_data()
+    assert time.perf_counter() - started < 0.02 * 3
+    assert [item[const.CONF_INSTALLATION_ID] for item in coordinator.installations] == ["installation-2", "installation-4"]
+    assert list(coordinator.data.values()) == list(recorded.values())
+    await coordinator.tokens.async_shutdown()
+
+    # At the recorded speed
+    coordinator = create_coordinator(hass, BlossomReplayClient(entries, speed=1))
+    started = time.perf_counter()
+    coordinator.data = await coordinator._async_update_data()
+    assert time.perf_counter() - started >= 0.02 * 3
+    await coordinator.tokens.async_shutdown()